@@ -13,16 +13,21 @@
 #   python notepadpp_full.py
 
 from __future__ import annotations
-import os, sys, re, json, time, fnmatch, importlib.util, subprocess, shlex
+import os, sys, re, json, time, bisect, codecs, fnmatch, hashlib, mmap, multiprocessing, importlib.util, subprocess, shlex
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass
-from typing import Optional, List, Tuple, Dict
+from functools import lru_cache
+from types import ModuleType
+from typing import Optional, List, Tuple, Dict, Union
 from pathlib import Path
 
 from PyQt6.QtCore import (
-    Qt, QSettings, QSize, QTimer, QEvent, pyqtSignal, QObject, QPoint
+    Qt, QSettings, QSize, QTimer, QEvent, pyqtSignal, QObject, QPoint, QThread, QFileSystemWatcher, QProcess
 )
 from PyQt6.QtGui import (
-    QAction, QIcon, QKeySequence, QCloseEvent, QGuiApplication, QPalette
+    QAction, QIcon, QKeySequence, QCloseEvent, QGuiApplication, QPalette, QTextCursor
 )
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QFileDialog, QMessageBox, QWidget, QVBoxLayout,
@@ -40,7 +45,364 @@ APP_NAME = "NotepadPP-Full"
 MAX_RECENTS = 15
 SESSION_FILE = str(Path.home() / ".npp_full_session.json")
 PLUGINS_DIR = str(Path(__file__).parent / "plugins")
-CHECK_DISK_MS = 2000
+FUNCLIST_DEBOUNCE_MS = 150
+
+# ---------------- Regex engine ----------------
+# google-re2 (optional) matches in linear time, so a pathological Find in Files pattern
+# cannot hang the scan. Patterns re2 rejects (backreferences, lookaround) fall back to re,
+# and so do \w \W \b \B, which re2 only matches for ASCII: Whole word on "café" must agree.
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+_NL = re.compile("\n")
+_NLB = re.compile(b"\n")
+# Line breaks and tabs -> spaces in result snippets, done in C by translate()
+_SNIP_TBL = bytes.maketrans(b"\r\n\t", b"   ")
+_SNIP_STR_TBL = str.maketrans("\r\n\t", "   ")
+
+# Function list parsers, compiled once at import
+_PY_FUNC_RX = re.compile(r"^\s*(def|class)\s+([A-Za-z_]\w*)", re.MULTILINE)
+_C_FUNC_RX = re.compile(r"^\s*(?:[A-Za-z_][\w<>\[\]\s\*:&]+)?\s+([A-Za-z_]\w*)\s*\([^;]*\)\s*\{?", re.MULTILINE)
+_F_FUNC_RX = re.compile(r"^\s*(SUBROUTINE|FUNCTION)\s+([A-Za-z_]\w*)", re.IGNORECASE | re.MULTILINE)
+_PY_FUNC = (_PY_FUNC_RX, lambda m: f"{m.group(1)} {m.group(2)}")
+_C_FUNC = (_C_FUNC_RX, lambda m: m.group(1) + "()")
+_F_FUNC = (_F_FUNC_RX, lambda m: f"{m.group(1).title()} {m.group(2)}")
+# extension -> (parser, label); files without an extension are treated as Python
+FUNC_PARSERS = {
+    "": _PY_FUNC, ".py": _PY_FUNC,
+    ".c": _C_FUNC, ".h": _C_FUNC, ".cpp": _C_FUNC, ".hpp": _C_FUNC, ".cc": _C_FUNC, ".java": _C_FUNC, ".js": _C_FUNC,
+    ".f": _F_FUNC, ".f90": _F_FUNC, ".f95": _F_FUNC, ".for": _F_FUNC,
+}
+
+@lru_cache(maxsize=256)
+def _compile(pattern, flags: int = 0):
+    # Find/Replace recompiles the same few patterns on every keystroke; re's own cache is small
+    return re.compile(pattern, flags)
+
+# Regex tokens that change meaning between engines or str/bytes modes. Escapes come first,
+# so "\\b" is an escaped backslash followed by a literal b, not a word boundary.
+_RX_TOKEN = re.compile(r"\\.|\[\^|\(\?|\.", re.S)
+
+def _has_escape(pattern: str, chars: str) -> bool:
+    return any(t[0] == "\\" and t[1] in chars for t in _RX_TOKEN.findall(pattern))
+
+def _bytes_safe(pattern: str) -> bool:
+    """True if the pattern finds the same spans as a bytes regex over UTF-8 as it does as str.
+    Bytes mode reads \\w \\b \\s \\d, '.', negated classes and \\x escapes per byte/ASCII
+    (Whole word "caf" would match inside "café"), and rejects (?u) and \\N{...}."""
+    return pattern.isascii() and not any(t[0] != "\\" or t[1] in "wWbBsSdDNuUx0123456789"
+                                         for t in _RX_TOKEN.findall(pattern))
+
+def compile_search(pattern, flags: int = 0):
+    if re2 is not None and (isinstance(pattern, bytes) or not _has_escape(pattern, "wWbB")):
+        inline = ("i" if flags & re.IGNORECASE else "") + ("m" if flags & re.MULTILINE else "")
+        prefix = f"(?{inline})" if inline else ""
+        if isinstance(pattern, bytes):
+            prefix = prefix.encode()
+        try:
+            return re2.compile(prefix + pattern)
+        except Exception:
+            pass
+    return re.compile(pattern, flags)
+
+# ---------------- Find in Files ----------------
+def mask_regex(mask_list: List[str]):
+    """All masks folded into one pattern, so each directory entry costs a single match()."""
+    if not mask_list: return None
+    flags = re.IGNORECASE if os.path.normcase("A") == "a" else 0  # fnmatch's case rules
+    return re.compile("|".join(f"(?:{fnmatch.translate(m)})" for m in mask_list), flags)
+
+def iter_files(root: str, mask_list: List[str], recursive: bool):
+    # scandir's DirEntry type checks come from the directory read itself: no stat per entry
+    mask_re = mask_regex(mask_list)
+    stack = [root]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for e in it:
+                try:
+                    if e.is_dir(follow_symlinks=False):
+                        if recursive: stack.append(e.path)
+                    elif e.is_file() and (mask_re is None or mask_re.match(e.name)):
+                        yield e.path
+                except OSError:
+                    continue
+
+@lru_cache(maxsize=32)
+def _search_pattern(pattern: Union[str, bytes], flags: int):
+    return compile_search(pattern, flags)
+
+# A result row: (path, line, col, snippet, byte_col, byte_len). The byte pair locates the
+# match inside its line in UTF-8, which is how Scintilla addresses text.
+Row = Tuple[str, int, int, str, int, int]
+
+def _regex_spans(data, R):
+    return (m.span() for m in R.finditer(data))
+
+def _literal_spans(hay, needle: bytes):
+    # bytes.find / mmap.find run a two-way/Boyer-Moore style search in C
+    i, n = hay.find(needle), len(needle)
+    while i >= 0:
+        yield i, i + n
+        i = hay.find(needle, i + n)
+
+def _match_rows(path: str, data, spans) -> List[Row]:
+    rows = []
+    is_bytes = not isinstance(data, str)
+    nl = None  # newline offsets, built on the first match in this file
+    for s, e in spans:
+        if nl is None:
+            nl = [n.start() for n in (_NLB if is_bytes else _NL).finditer(data)]
+        line = bisect.bisect_left(nl, s) + 1
+        ls = nl[line-2] + 1 if line > 1 else 0
+        snippet = data[max(0, s-40):e+40]
+        if is_bytes:
+            # Only the line prefix and the snippet are decoded; columns stay in characters
+            col = len(data[ls:s].decode("utf-8", "ignore"))
+            snippet = snippet.translate(_SNIP_TBL).decode("utf-8", "ignore")
+            bcol, blen = s - ls, e - s
+        else:
+            col = s - ls
+            snippet = snippet.translate(_SNIP_STR_TBL)
+            bcol, blen = len(data[ls:s].encode("utf-8")), len(data[s:e].encode("utf-8"))
+        rows.append((path, line, col+1, snippet, bcol, blen))
+    return rows
+
+def _scan_file(path: str, pattern: Union[str, bytes], flags: int, literal: Optional[bytes] = None, exact: bool = False) -> List[Row]:
+    """A Row for every match in one file. Runs in a worker process,
+    so it only takes and returns picklable values.
+
+    A bytes pattern (see _bytes_safe) runs over an mmap of the file, so nothing is decoded
+    unless it matches; a str pattern searches the decoded text. `literal` is the raw query
+    of a non-regex search: case-sensitive, it rules a file out with one mm.find(); with
+    `exact` (no whole-word test) it replaces the regex entirely."""
+    case = not flags & re.IGNORECASE
+    try:
+        with open(path, "rb") as fh:
+            if literal and exact and (case or literal.isascii()):
+                with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    # Case-insensitive: fold both sides once (ASCII only, hence the guard)
+                    hay, needle = (mm, literal) if case else (mm[:].lower(), literal.lower())
+                    return _match_rows(path, mm, _literal_spans(hay, needle))
+            if isinstance(pattern, str):
+                data = fh.read().decode("utf-8", "ignore")
+                return _match_rows(path, data, _regex_spans(data, _search_pattern(pattern, flags)))
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if literal and case and mm.find(literal) < 0:
+                    return []
+                R = _search_pattern(pattern, flags)
+                buf = mm if isinstance(R, re.Pattern) else mm[:]
+                return _match_rows(path, buf, _regex_spans(buf, R))
+    except (OSError, ValueError):  # ValueError: empty file, nothing to map
+        return []
+
+def _scan_files(paths: List[str], pattern: Union[str, bytes], flags: int, literal: Optional[bytes], exact: bool) -> List[Row]:
+    # One task per handful of files: a pickle round trip per small file costs more than its scan
+    rows: List[Row] = []
+    for p in paths:
+        rows.extend(_scan_file(p, pattern, flags, literal, exact))
+    return rows
+
+# One pool for the app's lifetime, started on the first search. Its workers come from
+# forkserver/spawn, never fork(): forking this multithreaded Qt process from a QThread can
+# deadlock the child on a lock some other thread held.
+_scan_pool: Optional[ProcessPoolExecutor] = None
+
+def scan_pool() -> ProcessPoolExecutor:
+    global _scan_pool
+    if _scan_pool is None:
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _scan_pool = ProcessPoolExecutor(mp_context=multiprocessing.get_context(method))
+    return _scan_pool
+
+def shutdown_scan_pool():
+    global _scan_pool
+    if _scan_pool is not None:
+        _scan_pool.shutdown(wait=False, cancel_futures=True)
+        _scan_pool = None
+
+# Completed searches: query -> (the (path, mtime_ns, size) of every candidate file, rows), so a
+# repeated search over an unchanged tree is answered without scanning. Any edit changes the stamps.
+_RESULTS_CACHE: "OrderedDict[tuple, Tuple[tuple, List[Row]]]" = OrderedDict()
+RESULTS_CACHE_SIZE = 8
+RESULTS_CACHE_ROWS = 200_000  # rows held across all entries; a larger result set isn't kept
+
+def _cache_results(query: tuple, stamps: tuple, rows: List[Row]):
+    if len(rows) > RESULTS_CACHE_ROWS:
+        return
+    _RESULTS_CACHE[query] = (stamps, rows)
+    total = sum(len(r) for _, r in _RESULTS_CACHE.values())
+    while len(_RESULTS_CACHE) > RESULTS_CACHE_SIZE or total > RESULTS_CACHE_ROWS:
+        total -= len(_RESULTS_CACHE.popitem(last=False)[1][1])
+
+def _file_stamp(path: str) -> Optional[Tuple[str, int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return path, st.st_mtime_ns, st.st_size
+
+class FindInFilesWorker(QThread):
+    """Walks the tree and fans the files out over the process pool, streaming rows back
+    while the walk is still going."""
+    resultsReady = pyqtSignal(list)
+    failed = pyqtSignal(str)
+    BATCH = 256
+    CHUNK = 16                              # files per pool task
+    INFLIGHT = 2 * (os.cpu_count() or 4)    # tasks queued ahead of the one being collected
+
+    def __init__(self, root: str, mask_list: List[str], recursive: bool, pattern: Union[str, bytes], flags: int,
+                 literal: Optional[bytes] = None, exact: bool = False, parent=None):
+        super().__init__(parent)
+        self.root, self.mask_list, self.recursive = root, mask_list, recursive
+        self.pattern, self.flags, self.literal, self.exact = pattern, flags, literal, exact
+
+    def run(self):
+        try:
+            self._search()
+        except Exception as e:  # an exception escaping QThread.run() aborts the app
+            if isinstance(e, BrokenProcessPool):
+                shutdown_scan_pool()  # the next search starts a fresh one
+            self.failed.emit(str(e) or type(e).__name__)
+
+    def _collect(self, fut) -> Optional[List[Row]]:
+        # Polled, so an interruption (closing the window) never waits out a whole task
+        while True:
+            try:
+                return fut.result(timeout=0.1)
+            except FuturesTimeout:
+                if self.isInterruptionRequested():
+                    return None
+
+    def _search(self):
+        query = (self.root, tuple(self.mask_list), self.recursive, self.pattern, self.flags, self.literal, self.exact)
+        files = iter_files(self.root, self.mask_list, self.recursive)
+        stamps: list = []
+        cached = _RESULTS_CACHE.get(query)
+        if cached is not None:
+            # Revalidating needs the whole listing before the first scan; a miss scans that list
+            files = list(files)
+            stamps = [st for st in map(_file_stamp, files) if st]
+            if tuple(sorted(stamps)) == cached[0]:
+                _RESULTS_CACHE.move_to_end(query)
+                rows = cached[1]
+                for i in range(0, len(rows), self.BATCH):
+                    self.resultsReady.emit(rows[i:i+self.BATCH])
+                return
+            del _RESULTS_CACHE[query]
+
+        pool, args = scan_pool(), (self.pattern, self.flags, self.literal, self.exact)
+        pending: deque = deque()
+        batch, found, chunk = [], [], []
+
+        def take() -> bool:
+            # Tasks are collected in submission order, so rows arrive in walk order
+            nonlocal batch
+            rows = self._collect(pending.popleft())
+            if rows is None:
+                return False
+            batch.extend(rows); found.extend(rows)
+            if len(batch) >= self.BATCH:
+                self.resultsReady.emit(batch); batch = []
+            return True
+
+        def cancel():
+            for f in pending:
+                f.cancel()
+
+        for path in files:
+            if self.isInterruptionRequested():
+                return cancel()
+            if cached is None:
+                st = _file_stamp(path)
+                if st: stamps.append(st)
+            chunk.append(path)
+            if len(chunk) == self.CHUNK:
+                pending.append(pool.submit(_scan_files, chunk, *args)); chunk = []
+                while pending and (len(pending) >= self.INFLIGHT or pending[0].done()):
+                    if not take():
+                        return cancel()
+        if chunk:
+            pending.append(pool.submit(_scan_files, chunk, *args))
+        while pending:
+            if not take():
+                return cancel()
+        if batch:
+            self.resultsReady.emit(batch)
+        # Only a full scan is cached
+        _cache_results(query, tuple(sorted(stamps)), found)
+
+# ---------------- Session I/O ----------------
+# orjson (optional) serializes several times faster than the stdlib; both read the same file
+try:
+    import orjson
+    def _dumps(obj) -> bytes: return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    _loads = orjson.loads
+except ImportError:
+    orjson = None
+    def _dumps(obj) -> bytes: return json.dumps(obj, indent=2).encode("utf-8")
+    _loads = json.loads
+
+def write_atomic(path: str, data: bytes):
+    # Write a sibling temp file and rename it over the target: a crash never leaves a truncated file
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+# ---------------- Disk watcher ----------------
+# One watcher for the whole app (inotify / FSEvents / ReadDirectoryChangesW): the kernel
+# reports changes, instead of the editor stat()ing every open file on a timer.
+_watcher: Optional[QFileSystemWatcher] = None
+
+def file_watcher() -> QFileSystemWatcher:
+    global _watcher
+    if _watcher is None:
+        _watcher = QFileSystemWatcher()
+    return _watcher
+
+def watch_file(path: str):
+    w = file_watcher()
+    if path and os.path.exists(path) and path not in w.files():
+        w.addPath(path)
+
+# Content fingerprint: a touch/chmod (or a coarse network-FS mtime) changes mtime but not the
+# bytes, and should not cost a reload. xxh3 (optional) hashes at memory speed; blake2b otherwise.
+try:
+    import xxhash
+    _new_hasher = xxhash.xxh3_64
+except ImportError:
+    xxhash = None
+    _new_hasher = lambda: hashlib.blake2b(digest_size=8)
+
+def data_fingerprint(data: bytes) -> bytes:
+    h = _new_hasher()
+    h.update(data)
+    return h.digest()
+
+def file_fingerprint(path: str) -> Optional[bytes]:
+    try:
+        h = _new_hasher()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        return h.digest()
+    except OSError:
+        return None
+
+# ---------------- Plugins ----------------
+def _load_plugin_module(path: str) -> ModuleType:
+    # Pure import step, safe to run on a pool thread; register() still runs on the GUI thread
+    spec = importlib.util.spec_from_file_location(Path(path).stem, path)
+    assert spec and spec.loader
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)  # type: ignore
+    return mod
 
 # ---------------- Data classes ----------------
 @dataclass
@@ -49,6 +411,7 @@ class FileState:
     encoding: str = "utf-8"
     eol: str = "LF"    # LF | CRLF | CR
     mtime: Optional[float] = None
+    fingerprint: Optional[bytes] = None  # content hash as of the last load/save
     cursor_line: int = 0
     cursor_col: int = 0
 
@@ -65,6 +428,10 @@ class SciEditor(QsciScintilla):
         self.file_state = FileState(path=None)
         self._recording = False
         self._macro: List[Tuple[str, str]] = []  # (type, data), e.g., ("text", "a"), ("key","Backspace")
+        # Bumped on every edit; cached per-document results (function list) are keyed on it
+        self.edit_serial = 0
+        self.funclist_cache: Optional[Tuple[tuple, List[Tuple[str, int]]]] = None
+        self.textChanged.connect(self._bump_serial)
         self._init_editor()
 
     # -------- Initialization
@@ -112,6 +479,9 @@ class SciEditor(QsciScintilla):
         # Track zoom steps for %
         self._zoom_steps = 0
 
+    def _bump_serial(self):
+        self.edit_serial += 1
+
     # -------- Lexers
     def apply_lexer_for(self, path: Optional[str]):
         lexer = None
@@ -155,10 +525,17 @@ class SciEditor(QsciScintilla):
 
     # -------- Load/Save
     def load_from_file(self, path: str, encoding_choices: List[str] = ["utf-8", "latin-1"]) -> bool:
+        # Read once: every encoding tried, and the fingerprint, come from the same bytes
+        try:
+            raw = Path(path).read_bytes()
+        except Exception as e:
+            QMessageBox.critical(self, "Open failed", f"Could not open:\n{path}\n\n{e}")
+            return False
         err = None
         for enc in encoding_choices:
             try:
-                data = Path(path).read_text(encoding=enc, errors=("strict" if enc=="utf-8" else "ignore"))
+                # decode + universal newlines, as read_text() did
+                data = raw.decode(enc, errors=("strict" if enc=="utf-8" else "ignore")).replace("\r\n", "\n").replace("\r", "\n")
                 self.setText(data)
                 self.file_state.path = path
                 self.file_state.encoding = enc
@@ -167,6 +544,8 @@ class SciEditor(QsciScintilla):
                 except Exception:
                     self.file_state.mtime = None
                 self.apply_lexer_for(path)
+                self.file_state.fingerprint = data_fingerprint(raw)
+                watch_file(path)
                 return True
             except Exception as e:
                 err = e
@@ -189,13 +568,16 @@ class SciEditor(QsciScintilla):
         else:
             text = text.replace("\r\n", "\n").replace("\r", "\n")
         try:
-            Path(path).write_text(text, encoding=enc, errors="strict")
+            payload = text.encode(enc, errors="strict")
+            Path(path).write_bytes(payload)
             self.file_state.path = path
             self.file_state.encoding = enc
             try:
                 self.file_state.mtime = os.path.getmtime(path)
             except Exception:
                 self.file_state.mtime = None
+            self.file_state.fingerprint = data_fingerprint(payload)
+            watch_file(path)
             return True
         except Exception as e:
             QMessageBox.critical(self, "Save failed", f"Could not save:\n{path}\n\n{e}")
@@ -377,7 +759,7 @@ class FindInFilesDialog(QDialog):
         self.regex_cb = QCheckBox("Regex")
         self.recur_cb = QCheckBox("Include subfolders"); self.recur_cb.setChecked(True)
 
-        run = QPushButton("Search"); close = QPushButton("Close")
+        self.run_btn = QPushButton("Search"); close = QPushButton("Close")
 
         grid.addWidget(QLabel("Folder:"), 0, 0); grid.addWidget(self.dir_edit, 0, 1); grid.addWidget(browse, 0, 2)
         grid.addWidget(QLabel("Masks:"), 1, 0); grid.addWidget(self.masks_edit, 1, 1, 1, 2)
@@ -388,12 +770,12 @@ class FindInFilesDialog(QDialog):
             row.addWidget(w)
         wrap = QWidget(); wrap.setLayout(row); grid.addWidget(wrap, 3, 0, 1, 3)
 
-        row2 = QHBoxLayout(); row2.addWidget(run); row2.addWidget(close)
+        row2 = QHBoxLayout(); row2.addWidget(self.run_btn); row2.addWidget(close)
         wrap2 = QWidget(); wrap2.setLayout(row2); grid.addWidget(wrap2, 4, 0, 1, 3)
 
         browse.clicked.connect(self._browse)
         close.clicked.connect(self.close)
-        run.clicked.connect(self._run)
+        self.run_btn.clicked.connect(self._run)
 
     def _browse(self):
         d = QFileDialog.getExistingDirectory(self, "Choose folder", "")
@@ -441,9 +823,16 @@ class ConsoleDock(QDockWidget):
         super().__init__("Console", parent)
         self.setObjectName("ConsoleDock")
         self.out = QTextEdit(); self.out.setReadOnly(True)
+        self.out.document().setMaximumBlockCount(5000)  # bound memory for chatty commands
         w = QWidget(); lay = QVBoxLayout(w); lay.setContentsMargins(0,0,0,0); lay.addWidget(self.out)
         self.setWidget(w)
 
+    def write(self, text: str):
+        # Raw append at the end: output arrives in arbitrary chunks, not whole lines
+        self.out.moveCursor(QTextCursor.MoveOperation.End)
+        self.out.insertPlainText(text)
+        self.out.ensureCursorVisible()
+
 # ---------------- Tab wrapper ----------------
 class EditorTab(QWidget):
     def __init__(self, path: Optional[str] = None, parent=None):
@@ -489,6 +878,12 @@ class MainWindow(QMainWindow):
         self.find_dialog.replace_one.connect(self._replace_one)
         self.find_dialog.replace_all.connect(self._replace_all)
         self.find_files_dialog = FindInFilesDialog(self)
+        self._find_worker: Optional[FindInFilesWorker] = None
+        self._funclist_shown = None  # (id(editor), token) currently listed in the function dock
+        self._plugin_cache: Dict[str, Tuple[float, object]] = {}  # path -> (mtime, module or load error)
+        self._plugin_actions: List[QAction] = []
+        self._last_saved_sess = None  # skip the write when nothing changed since load/last save
+        self._tab_menu: Optional[QMenu] = None
 
         # Menus/Toolbar
         self._make_actions()
@@ -503,8 +898,12 @@ class MainWindow(QMainWindow):
         self.func_dock.list.itemActivated.connect(self._goto_function_item)
         self.results_dock.tree.itemDoubleClicked.connect(self._open_result_item)
 
-        # Disk change timer
-        self.disk_timer = QTimer(self); self.disk_timer.timeout.connect(self._check_disk_changes); self.disk_timer.start(CHECK_DISK_MS)
+        # Disk changes arrive from the watcher; queued so a reload never runs inside the notifier
+        file_watcher().fileChanged.connect(self._on_file_changed, Qt.ConnectionType.QueuedConnection)
+
+        # Function list: fast tab cycling coalesces into one parse
+        self._funclist_timer = QTimer(self); self._funclist_timer.setSingleShot(True)
+        self._funclist_timer.setInterval(FUNCLIST_DEBOUNCE_MS); self._funclist_timer.timeout.connect(self._update_function_list)
 
         # Session restore
         self._load_session()
@@ -611,11 +1010,19 @@ class MainWindow(QMainWindow):
 
     def closeEvent(self, e: QCloseEvent):
         # TODO prompt unsaved tabs (simplified: no prompt per instruction brevity)
+        if self._find_worker and self._find_worker.isRunning():
+            self._find_worker.requestInterruption(); self._find_worker.wait()  # polls: returns within ~0.1 s
+        shutdown_scan_pool()
         self._save_session()
         super().closeEvent(e)
 
     def _close_tab(self, tabs: QTabWidget, index: int):
+        self._funclist_shown = None  # editor ids can be reused once the tab is gone
+        w = tabs.widget(index)
+        path = w.editor.file_state.path if isinstance(w, EditorTab) else None
         tabs.removeTab(index)
+        if path and not self._editors_for(path):
+            file_watcher().removePath(path)
         if tabs.count() == 0 and tabs is self.tabs_left:
             self.new_file()
 
@@ -632,9 +1039,12 @@ class MainWindow(QMainWindow):
         if abspath in rec: rec.remove(abspath)
         rec.insert(0, abspath); rec = rec[:MAX_RECENTS]
         self.settings.setValue("recent_files", rec)
-        self._rebuild_recents_menu()
+        self._recents_dirty = True
 
     def _rebuild_recents_menu(self):
+        # Built on aboutToShow, and only when the list changed since the last build
+        if not self._recents_dirty: return
+        self._recents_dirty = False
         self.recent_menu.clear()
         rec = self.settings.value("recent_files", [], list)
         if not rec:
@@ -644,7 +1054,10 @@ class MainWindow(QMainWindow):
                 act = self.recent_menu.addAction(p)
                 act.triggered.connect(lambda _, path=p: self._open_path(path))
             self.recent_menu.addSeparator()
-            self.recent_menu.addAction("Clear List", lambda: (self.settings.setValue("recent_files", []), self._rebuild_recents_menu()))
+            self.recent_menu.addAction("Clear List", self._clear_recents)
+
+    def _clear_recents(self):
+        self.settings.setValue("recent_files", []); self._recents_dirty = True
 
     # ---------- Search ----------
     def _qflags(self, case: bool, whole: bool, regex: bool):
@@ -671,7 +1084,7 @@ class MainWindow(QMainWindow):
         if ww:
             pattern = r"\b" + pattern + r"\b"
         flags = 0 if cs else re.IGNORECASE
-        R = re.compile(pattern, flags | re.MULTILINE)
+        R = _compile(pattern, flags | re.MULTILINE)
 
         if backwards:
             m = None
@@ -708,13 +1121,35 @@ class MainWindow(QMainWindow):
         if sel_only and ed.hasSelectedText():
             l1, c1, l2, c2 = ed.getSelection()
             sel_text = ed.selectedText().replace('\r\n', '\n')
-            R = re.compile(pat if rx else re.escape(pat), 0 if cs else re.IGNORECASE | re.MULTILINE)
+            R = _compile(pat if rx else re.escape(pat), 0 if cs else re.IGNORECASE | re.MULTILINE)
             new_sel = R.sub(rep, sel_text)
             ed.setSelection(l1, c1, l2, c2); ed.replaceSelectedText(new_sel)
         else:
-            R = re.compile(pat if rx else re.escape(pat), 0 if cs else re.IGNORECASE | re.MULTILINE)
-            new = R.sub(rep, text)
-            ed.setText(new)
+            R = _compile(pat if rx else re.escape(pat), 0 if cs else re.IGNORECASE | re.MULTILINE)
+            n = self._replace_matches(ed, R, rep, text)
+            self.status.showMessage(f"Replaced {n} occurrence(s)", 2000)
+
+    def _replace_matches(self, ed: SciEditor, R, rep: str, text: str) -> int:
+        # Replace each match in place through Scintilla's target instead of setText() on the
+        # whole buffer, so styling, markers and undo history survive and Replace All is one
+        # undo step. Scintilla positions are UTF-8 byte offsets: walk the matches forward
+        # encoding only the gaps, then apply back to front so earlier offsets stay valid.
+        spans = []; b = 0; prev = 0
+        for m in R.finditer(text):
+            s, e = m.span()
+            b += len(text[prev:s].encode("utf-8")); start = b
+            b += len(text[s:e].encode("utf-8")); prev = e
+            spans.append((start, b, m.expand(rep).encode("utf-8")))
+        if not spans:
+            return 0
+        ed.beginUndoAction()
+        try:
+            for start, end, r in reversed(spans):
+                ed.SendScintilla(QsciScintilla.SCI_SETTARGETRANGE, start, end)
+                ed.SendScintilla(QsciScintilla.SCI_REPLACETARGET, len(r), r)
+        finally:
+            ed.endUndoAction()
+        return len(spans)
 
     def _find_next(self, pat, cs, ww, rx, sel_only, backwards):
         ed = self._editor()
@@ -732,40 +1167,64 @@ class MainWindow(QMainWindow):
         mask_list = [m.strip() for m in masks.split(";") if m.strip()]
         self.results_dock.clear(); self.results_dock.show()
         flags = 0 if case else re.IGNORECASE
+        literal = None if regex else text.encode("utf-8")
         if not regex: text = re.escape(text)
         if whole: text = r"\b" + text + r"\b"
+        flags |= re.MULTILINE
         try:
-            R = re.compile(text, flags | re.MULTILINE)
+            _search_pattern(text, flags)  # surface syntax errors here; workers compile their own copy
         except re.error as e:
             QMessageBox.warning(self, "Regex error", str(e)); return
-
-        def iter_files():
-            p = Path(root)
-            if not p.exists(): return
-            it = p.rglob("*") if self.find_files_dialog.recur_cb.isChecked() else p.glob("*")
-            for f in it:
-                if f.is_file():
-                    if mask_list and not any(fnmatch.fnmatch(f.name, m) for m in mask_list):
-                        continue
-                    yield f
-
-        for f in iter_files():
+        # Byte-safe patterns are handed to the workers as bytes, and the bytes form is compiled
+        # here as well: one that is only valid as str falls back instead of failing in every worker
+        pattern: Union[str, bytes] = text
+        if _bytes_safe(text):
             try:
-                data = f.read_text(encoding="utf-8", errors="ignore")
-            except Exception:
-                continue
-            for m in R.finditer(data):
-                line = data.count("\n", 0, m.start()) + 1
-                col = m.start() - (data.rfind("\n", 0, m.start()) + 1)
-                snippet = data[max(0, m.start()-40):m.end()+40].replace("\n", " ")
-                item = QTreeWidgetItem([str(f), str(line), str(col+1), snippet])
-                self.results_dock.tree.addTopLevelItem(item)
+                pattern = text.encode("ascii"); _search_pattern(pattern, flags)
+            except re.error:
+                pattern = text
+
+        # Scanning runs off the GUI thread; Search stays disabled until the worker is done
+        recursive = self.find_files_dialog.recur_cb.isChecked()
+        worker = self._find_worker = FindInFilesWorker(root, mask_list, recursive, pattern, flags, literal, not whole, self)
+        worker.resultsReady.connect(self._add_find_results)
+        worker.failed.connect(lambda msg: QMessageBox.warning(self, "Find in Files", msg))
+        worker.finished.connect(lambda w=worker: self._find_files_done(w))
+        self.find_files_dialog.run_btn.setEnabled(False)
+        worker.start()
+
+    def _find_files_done(self, worker: FindInFilesWorker):
+        if worker is self._find_worker:
+            self._find_worker = None
+        self.find_files_dialog.run_btn.setEnabled(True)
+        worker.deleteLater()
+
+    def _add_find_results(self, rows: list):
+        tree = self.results_dock.tree
+        items = []
+        for path, line, col, snippet, bcol, blen in rows:
+            it = QTreeWidgetItem([path, str(line), str(col), snippet])
+            it.setData(0, Qt.ItemDataRole.UserRole, (bcol, blen))
+            items.append(it)
+        # A sorted tree would re-sort on every insert; sort once when the batch is in
+        sorting = tree.isSortingEnabled()
+        tree.setSortingEnabled(False); tree.setUpdatesEnabled(False)
+        tree.addTopLevelItems(items)
+        tree.setSortingEnabled(sorting); tree.setUpdatesEnabled(True)
 
     def _open_result_item(self, item: QTreeWidgetItem, _col: int):
         path = item.text(0); line = int(item.text(1)); col = int(item.text(2))
         self._open_path(path)
         ed = self._editor()
         if not ed: return
+        span = item.data(0, Qt.ItemDataRole.UserRole)
+        if span and ed.file_state.encoding == "utf-8":
+            # Line start + byte column is a direct Scintilla position: no per-character walk
+            pos = ed.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, line-1) + span[0]
+            ed.SendScintilla(QsciScintilla.SCI_GOTOPOS, pos)
+            ed.SendScintilla(QsciScintilla.SCI_SETSEL, pos, pos + span[1])
+            ed.ensureLineVisible(line-1)
+            return
         ed.setCursorPosition(line-1, col-1); ed.ensureLineVisible(line-1)
         ed.setSelection(line-1, col-1, line-1, col)
 
@@ -774,29 +1233,39 @@ class MainWindow(QMainWindow):
         ed = self._editor()
         if not ed: return
         path = ed.file_state.path or ""
-        text = ed.text()
-        items: List[Tuple[str,int]] = []
-        ext = Path(path).suffix.lower()
-        if ext == ".py" or not ext:
-            rx = re.compile(r"^\s*(def|class)\s+([A-Za-z_]\w*)", re.MULTILINE)
-            for m in rx.finditer(text):
-                items.append((f"{m.group(1)} {m.group(2)}", text.count("\n", 0, m.start())+1))
-        elif ext in (".c",".h",".cpp",".hpp",".cc",".java",".js"):
-            rx = re.compile(r"^\s*(?:[A-Za-z_][\w<>\[\]\s\*:&]+)?\s+([A-Za-z_]\w*)\s*\([^;]*\)\s*\{?", re.MULTILINE)
-            for m in rx.finditer(text):
-                items.append((m.group(1)+"()", text.count("\n", 0, m.start())+1))
-        elif ext in (".f",".f90",".f95",".for"):
-            rx = re.compile(r"^\s*(SUBROUTINE|FUNCTION)\s+([A-Za-z_]\w*)", re.IGNORECASE | re.MULTILINE)
-            for m in rx.finditer(text):
-                items.append((f"{m.group(1).title()} {m.group(2)}", text.count("\n", 0, m.start())+1))
-        self.func_dock.list.clear()
-        if items:
-            self.func_dock.show()
+        token = (ed.edit_serial, path)
+        if self._funclist_shown == (id(ed), token):
+            return  # dock already lists this editor's unchanged text
+        if ed.funclist_cache and ed.funclist_cache[0] == token:
+            items = ed.funclist_cache[1]
+        else:
+            items = self._parse_functions(ed.text(), path)
+            ed.funclist_cache = (token, items)
+        self._funclist_shown = (id(ed), token)
+        lst = self.func_dock.list
+        # One repaint for the whole list instead of one per row
+        lst.setUpdatesEnabled(False); lst.blockSignals(True)
+        try:
+            lst.clear()
             for label, ln in items:
                 it = QListWidgetItem(f"{label}  —  line {ln}"); it.setData(Qt.ItemDataRole.UserRole, ln)
-                self.func_dock.list.addItem(it)
-        else:
-            self.func_dock.hide()
+                lst.addItem(it)
+        finally:
+            lst.blockSignals(False); lst.setUpdatesEnabled(True)
+        self.func_dock.setVisible(bool(items))
+
+    def _parse_functions(self, text: str, path: str) -> List[Tuple[str, int]]:
+        items: List[Tuple[str,int]] = []
+        parser = FUNC_PARSERS.get(Path(path).suffix.lower())
+        if not parser:
+            return items
+        rx, label = parser
+        # One pass: line numbers advance from the previous match instead of recounting from 0
+        line, prev = 1, 0
+        for m in rx.finditer(text):
+            line += text.count("\n", prev, m.start()); prev = m.start()
+            items.append((label(m), line))
+        return items
 
     def _goto_function_item(self, item: QListWidgetItem):
         ln = int(item.data(Qt.ItemDataRole.UserRole))
@@ -805,20 +1274,32 @@ class MainWindow(QMainWindow):
         ed.setCursorPosition(ln-1, 0); ed.ensureLineVisible(ln-1)
 
     # ---------- Disk changes ----------
-    def _check_disk_changes(self):
+    def _editors_for(self, path: str) -> List[SciEditor]:
+        target = os.path.abspath(path); out = []
         for tabs in (self.tabs_left, self.tabs_right):
             for i in range(tabs.count()):
                 w: EditorTab = tabs.widget(i)  # type: ignore
-                ed = w.editor
-                p = ed.file_state.path
-                if not p: continue
-                try:
-                    m = os.path.getmtime(p)
-                except Exception:
+                p = w.editor.file_state.path
+                if p and os.path.abspath(p) == target:
+                    out.append(w.editor)
+        return out
+
+    def _on_file_changed(self, path: str):
+        # Editors that save by replacing the file drop the watch; re-arm it
+        watch_file(path)
+        try:
+            m = os.path.getmtime(path)
+        except Exception:
+            return
+        fp = None
+        for ed in self._editors_for(path):
+            if ed.file_state.mtime and m > ed.file_state.mtime and not ed.isModified():
+                fp = fp or file_fingerprint(path)
+                if fp is not None and fp == ed.file_state.fingerprint:
+                    ed.file_state.mtime = m  # metadata-only change: nothing to reload
                     continue
-                if ed.file_state.mtime and m > ed.file_state.mtime and not ed.isModified():
-                    # auto-reload silently
-                    ed.load_from_file(p)
+                # auto-reload silently
+                ed.load_from_file(path)
 
     # ---------- Status updates ----------
     def _update_status_pos(self, line: int, col: int):
@@ -835,7 +1316,7 @@ class MainWindow(QMainWindow):
 
     def _on_current_changed(self, tabs: QTabWidget):
         self._update_status_all()
-        self._update_function_list()
+        self._funclist_timer.start()
 
     # ---------- Menus & toolbar ----------
     def _make_actions(self):
@@ -903,7 +1384,8 @@ class MainWindow(QMainWindow):
         m_file.addSeparator()
         for a in (self.act_save, self.act_save_as, self.act_save_all): m_file.addAction(a)
         m_file.addSeparator()
-        self.recent_menu = m_file.addMenu("Open &Recent"); self._rebuild_recents_menu()
+        self.recent_menu = m_file.addMenu("Open &Recent"); self._recents_dirty = True
+        self.recent_menu.aboutToShow.connect(self._rebuild_recents_menu)
         m_file.addSeparator()
         for a in (self.act_close, self.act_exit): m_file.addAction(a)
 
@@ -987,8 +1469,19 @@ class MainWindow(QMainWindow):
         ed = self._editor()
         if not ed: return
         try:
-            data = ed.text().encode(enc, errors=("ignore" if lossy else "strict")).decode(enc, errors="strict")
-            ed.setText(data)
+            # Unicode targets can represent any text, so only the save encoding changes. Others
+            # round-trip 1 MiB at a time and replace the buffer only if the target dropped something.
+            if codecs.lookup(enc).name not in ("utf-8", "utf-16", "utf-32"):
+                encoder = codecs.getincrementalencoder(enc)(errors=("ignore" if lossy else "strict"))
+                decoder = codecs.getincrementaldecoder(enc)(errors="strict")
+                text = ed.text(); parts = []; changed = False; step = 1 << 20
+                for i in range(0, len(text), step):
+                    chunk = text[i:i+step]; final = i + step >= len(text)
+                    out = decoder.decode(encoder.encode(chunk, final=final), final=final)
+                    changed = changed or out != chunk
+                    parts.append(out)
+                if changed:
+                    ed.setText("".join(parts))
             ed.file_state.encoding = enc
             self.enc_label.setText(enc.upper())
         except Exception as e:
@@ -1014,32 +1507,48 @@ class MainWindow(QMainWindow):
     def _load_plugins(self):
         # Create plugin dir if missing
         Path(PLUGINS_DIR).mkdir(parents=True, exist_ok=True)
-        # Clear previous plugin items (keep reload/open-dir actions at top)
-        # Add a separator after static items
-        while self.m_plugins.actions() and self.m_plugins.actions()[-1].text() != "":
-            pass
-        # Remove dynamic part: everything after the second separator
-        while self.m_plugins.actions() and self.m_plugins.actions()[-1].isSeparator():
-            self.m_plugins.removeAction(self.m_plugins.actions()[-1])
-        # Add separator
-        self.m_plugins.addSeparator()
-        # Load *.py in plugins dir
-        for pyf in sorted(Path(PLUGINS_DIR).glob("*.py")):
+        # Remove the entries added by the previous load (static reload/open-dir items stay)
+        for a in self._plugin_actions:
+            self.m_plugins.removeAction(a)
+        self._plugin_actions = []
+        # Only new or modified files are imported again, in parallel
+        pyfiles = sorted(Path(PLUGINS_DIR).glob("*.py"))
+        stale = []
+        for pyf in pyfiles:
             try:
-                spec = importlib.util.spec_from_file_location(pyf.stem, str(pyf))
-                mod = importlib.util.module_from_spec(spec)
-                assert spec and spec.loader
-                spec.loader.exec_module(mod)  # type: ignore
-                if hasattr(mod, "register"):
-                    submenu = self.m_plugins.addMenu(pyf.stem)
-                    try:
-                        mod.register(self, submenu)  # type: ignore
-                    except Exception as e:
-                        submenu.addAction(f"Error: {e}")
-                else:
-                    self.m_plugins.addAction(f"{pyf.stem} (no register())").setEnabled(False)
-            except Exception as e:
-                self.m_plugins.addAction(f"{pyf.stem} (load error)").setEnabled(False)
+                mtime = pyf.stat().st_mtime
+            except OSError:
+                continue
+            cached = self._plugin_cache.get(str(pyf))
+            if not cached or cached[0] != mtime:
+                stale.append((str(pyf), mtime))
+        if stale:
+            with ThreadPoolExecutor() as ex:
+                futs = [(key, mtime, ex.submit(_load_plugin_module, key)) for key, mtime in stale]
+            for key, mtime, fut in futs:
+                try:
+                    self._plugin_cache[key] = (mtime, fut.result())
+                except Exception as e:
+                    self._plugin_cache[key] = (mtime, e)
+        live = {str(pyf) for pyf in pyfiles}
+        for key in [k for k in self._plugin_cache if k not in live]:
+            del self._plugin_cache[key]
+        # Menus are built on the GUI thread, in file order
+        for pyf in pyfiles:
+            entry = self._plugin_cache.get(str(pyf))
+            if not entry: continue
+            mod = entry[1]
+            if isinstance(mod, Exception):
+                act = self.m_plugins.addAction(f"{pyf.stem} (load error)"); act.setEnabled(False)
+            elif hasattr(mod, "register"):
+                submenu = self.m_plugins.addMenu(pyf.stem); act = submenu.menuAction()
+                try:
+                    mod.register(self, submenu)  # type: ignore
+                except Exception as e:
+                    submenu.addAction(f"Error: {e}")
+            else:
+                act = self.m_plugins.addAction(f"{pyf.stem} (no register())"); act.setEnabled(False)
+            self._plugin_actions.append(act)
 
     # ---------- Tools ----------
     def _run_python_current(self):
@@ -1062,23 +1571,34 @@ class MainWindow(QMainWindow):
     def _run_command(self, cmd: str, cwd: Optional[str]=None):
         self.console_dock.show(); self.console_dock.raise_()
         self.console_dock.out.append(f"$ {cmd}\n")
-        try:
-            proc = subprocess.Popen(cmd, cwd=cwd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
-            out, _ = proc.communicate()
-            self.console_dock.out.append(out)
-        except Exception as e:
-            self.console_dock.out.append(str(e))
+        # QProcess streams output as it arrives instead of blocking the GUI until exit
+        proc = QProcess(self)
+        proc.setProcessChannelMode(QProcess.ProcessChannelMode.MergedChannels)
+        if cwd: proc.setWorkingDirectory(cwd)
+        dec = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        proc.readyReadStandardOutput.connect(lambda: self.console_dock.write(dec.decode(bytes(proc.readAllStandardOutput()))))
+        # FailedToStart never emits finished, so that branch frees the process itself
+        proc.errorOccurred.connect(lambda err: err == QProcess.ProcessError.FailedToStart and (self.console_dock.write(proc.errorString() + "\n"), proc.deleteLater()))
+        proc.finished.connect(lambda code, _status: (self.console_dock.write(dec.decode(b"", final=True) + f"\n[exit {code}]\n"), proc.deleteLater()))
+        if sys.platform.startswith("win"):
+            proc.start("cmd", ["/c", cmd])
+        else:
+            proc.start("/bin/sh", ["-c", cmd])
 
     # ---------- Context menu on tabs ----------
     def _tab_context_menu(self, tabs: QTabWidget, pos: QPoint):
         index = tabs.tabBar().tabAt(pos)
         if index < 0: return
-        menu = QMenu(self)
-        act_close = menu.addAction("Close")
-        act_close_others = menu.addAction("Close Others")
-        act_close_all = menu.addAction("Close All")
-        act_clone_other = menu.addAction("Clone to Other View")
-        act = menu.exec(tabs.mapToGlobal(pos))
+        if self._tab_menu is None:
+            # Built once and reused; each right-click only refreshes enabled states
+            menu = self._tab_menu = QMenu(self)
+            self._tab_acts = (menu.addAction("Close"), menu.addAction("Close Others"),
+                              menu.addAction("Close All"), menu.addAction("Clone to Other View"))
+        act_close, act_close_others, act_close_all, act_clone_other = self._tab_acts
+        w = tabs.widget(index)
+        act_close_others.setEnabled(tabs.count() > 1)
+        act_clone_other.setEnabled(isinstance(w, EditorTab) and bool(w.editor.file_state.path))
+        act = self._tab_menu.exec(tabs.mapToGlobal(pos))
         if act == act_close:
             self._close_tab(tabs, index)
         elif act == act_close_others:
@@ -1104,18 +1624,22 @@ class MainWindow(QMainWindow):
                 ed = w.editor
                 l, c = ed.getCursorPosition()
                 sess[label].append({"path": ed.file_state.path, "encoding": ed.file_state.encoding, "eol": ed.eol_str(), "line": l, "col": c})
+        if sess == self._last_saved_sess:
+            return
         try:
-            Path(SESSION_FILE).write_text(json.dumps(sess, indent=2))
+            write_atomic(SESSION_FILE, _dumps(sess))
+            self._last_saved_sess = sess
         except Exception:
             pass
 
     def _load_session(self):
         try:
-            data = json.loads(Path(SESSION_FILE).read_text())
+            data = _loads(Path(SESSION_FILE).read_bytes())
         except Exception:
             data = None
         if not data:
             return
+        self._last_saved_sess = data
         for label, tabs in (("left", self.tabs_left), ("right", self.tabs_right)):
             for ent in data.get(label, []):
                 path = ent.get("path")
@@ -3,13 +3,15 @@
 # Premium Notepad++-style editor, async via QThread (no QtConcurrent).
 
 from __future__ import annotations
-import os, sys, re, json, fnmatch, importlib.util, subprocess, shlex, time, traceback
+import os, sys, re, json, bisect, fnmatch, importlib.util, subprocess, shlex, time, traceback
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Dict
 from pathlib import Path
 
 from PyQt6.QtCore import (
-    Qt, QSettings, QSize, QTimer, QEvent, pyqtSignal, QPoint, QObject, QThread
+    Qt, QSettings, QSize, QTimer, QEvent, pyqtSignal, QPoint, QObject, QThread,
+    QRunnable, QThreadPool, QMutex
 )
 from PyQt6.QtGui import (
     QAction, QKeySequence, QCloseEvent, QFont, QFontDatabase, QColor, QIcon
@@ -26,6 +28,56 @@ from PyQt6.Qsci import (
     QsciLexerJavaScript, QsciLexerJava, QsciLexerBash, QsciLexerFortran, QsciLexerFortran77
 )
 
+# Session (de)serialisation: orjson when available, stdlib json otherwise
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> bytes: return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+    _loads = json.loads
+# Compact JSON is LZ4-framed on disk when lz4 is installed; plain JSON files still load.
+try:
+    import lz4.frame as lz4f
+except ImportError:
+    lz4f = None
+LZ4_MAGIC = b"\x04\x22\x4d\x18"
+
+def pack_session(obj) -> bytes:
+    buf = _dumps(obj)
+    return lz4f.compress(buf) if lz4f else buf
+
+def unpack_session(buf: bytes):
+    if buf[:4] == LZ4_MAGIC:
+        if not lz4f: raise RuntimeError("Session file is LZ4-compressed but lz4 is not installed")
+        buf = lz4f.decompress(buf)
+    return _loads(buf)
+
+# v2 sessions store each side as parallel columns; v1 stored a list of per-tab dicts.
+SESSION_VERSION = 2
+SESSION_COLUMNS = ("paths", "encodings", "eols", "lines", "cols")
+
+def session_entries(data: dict, label: str) -> List[Tuple]:
+    """(path, encoding, eol, line, col) rows for one side of a saved session."""
+    side = data.get(label) or {}
+    if data.get("version", 1) >= 2:
+        return list(zip(*(side.get(k, []) for k in SESSION_COLUMNS)))
+    return [(e.get("path"), e.get("encoding", "utf-8"), e.get("eol", "LF"), e.get("line", 0), e.get("col", 0)) for e in side]
+
+def existing_files(paths) -> set:
+    """Subset of paths that exist, found with one scandir per parent directory."""
+    by_dir = {}
+    for p in paths:
+        if p: by_dir.setdefault(os.path.dirname(p), []).append(p)
+    found = set()
+    for d, ps in by_dir.items():
+        try:
+            with os.scandir(d or ".") as it: names = {e.name for e in it}
+            found.update(p for p in ps if os.path.basename(p) in names)
+        except OSError:
+            found.update(p for p in ps if os.path.exists(p))
+    return found
+
 APP_ORG = "OpenDev"
 APP_NAME = "Notepad++ Pro (PyQt)"
 SESSION_FILE = str(Path.home() / ".npp_pro_session.json")
@@ -35,9 +87,8 @@ MAX_RECENTS = 20
 
 # ---------------- Fonts & Theme ----------------
 def best_mono_font(size: int = 13) -> QFont:
-    families = set(QFontDatabase.families())
     for name in ["SF Mono", "Menlo", "Monaco", "Courier New"]:
-        if name in families:
+        if QFontDatabase.hasFamily(name):
             f = QFont(name, size)
             f.setStyleStrategy(QFont.StyleStrategy.PreferAntialias)
             return f
@@ -198,6 +249,56 @@ def run_async(parent, fn, on_done, on_error=None, *args, **kwargs):
         worker.error.connect(lambda msg: (print('[ERROR]', msg), cleanup()))
     thread.start()
 
+class _PooledTask(QRunnable):
+    def __init__(self, worker: _Worker):
+        super().__init__()
+        self._worker = worker
+
+    def run(self):
+        self._worker.run()
+
+def run_pooled(parent, fn, on_done, on_error=None, *args, **kwargs):
+    """Like run_async, but on the shared QThreadPool instead of a thread per call.
+    The worker object stays in the GUI thread, so its signals are queued back to it."""
+    worker = _Worker(fn, *args, **kwargs); worker.setParent(parent)
+    worker.result.connect(lambda res: (on_done(res), worker.deleteLater()))
+    if on_error:
+        worker.error.connect(lambda msg: (on_error(msg), worker.deleteLater()))
+    else:
+        worker.error.connect(lambda msg: (print('[ERROR]', msg), worker.deleteLater()))
+    QThreadPool.globalInstance().start(_PooledTask(worker))
+
+class _LineEmitter(QObject):
+    """Carries streamed text from a worker thread to a GUI-thread slot."""
+    lineReady = pyqtSignal(str)
+
+class _SessionWriter(QRunnable):
+    """Write an already-serialised session on a pool thread (tmp file + rename)."""
+    _lock = QMutex(); _written = 0
+
+    def __init__(self, path: str, buf: bytes, seq: int):
+        super().__init__()
+        self._path = path; self._buf = buf; self._seq = seq
+
+    def run(self):
+        cls = _SessionWriter; cls._lock.lock()
+        try:
+            if self._seq <= cls._written: return  # a newer snapshot already landed
+            # Unbuffered write + fsync before the rename, so a crash leaves either the old
+            # file or the complete new one, never a truncated session.
+            tmp = self._path + ".tmp"; view = memoryview(self._buf)
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+            try:
+                while view: view = view[os.write(fd, view):]
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            os.replace(tmp, self._path); cls._written = self._seq
+        except Exception:
+            pass
+        finally:
+            cls._lock.unlock()
+
 # ---------------- Helpers: Busy Indicator & Error ----------------
 class BusyIndicator:
     def __init__(self, status: QStatusBar, message: str):
@@ -217,6 +318,62 @@ class BusyIndicator:
 def handle_exception(context: str, exc: BaseException):
     print(f"[ERROR] {context}: {exc}\n{traceback.format_exc()}", file=sys.stderr)
 
+@contextmanager
+def suspend_updates(*widgets: QWidget):
+    """Batch structural changes: no repaints or signals from widgets until the block exits."""
+    prev = [(w.updatesEnabled(), w.blockSignals(True)) for w in widgets]
+    for w in widgets: w.setUpdatesEnabled(False)
+    try: yield
+    finally:
+        for w, (upd, blk) in zip(widgets, prev): w.blockSignals(blk); w.setUpdatesEnabled(upd)
+
+# ---------------- Search helpers ----------------
+# Regex constructs Scintilla's C++11 engine lacks (lookbehind, named groups, inline
+# flags, conditionals); patterns using them stay on the Python `re` path.
+_PY_ONLY_RX = re.compile(r"\(\?(?![:=!])")
+# Letter/digit escapes std::regex (ECMAScript) knows; any other (\A, \Z, \g<name>, \N{...})
+# would silently match nothing there. Escaped punctuation is literal in both.
+_RX_ESCAPE = re.compile(r"\\(.)", re.S)
+_CXX_ESCAPES = frozenset("dDsSwWbBfnrtv0123456789xuc")
+
+def sci_can_search(pattern: str, rx: bool) -> bool:
+    if not rx: return True
+    if _PY_ONLY_RX.search(pattern): return False
+    return all(not c.isalnum() or c in _CXX_ESCAPES for c in _RX_ESCAPE.findall(pattern))
+
+def sci_can_replace(rep: str, rx: bool) -> bool:
+    # SCI_REPLACETARGETRE only expands \0-\9 and \\; \g<name>, \n etc. are re.sub templates
+    return not rx or all(c.isdigit() or c == "\\" for c in _RX_ESCAPE.findall(rep))
+
+def sci_search_flags(cs: bool, ww: bool, rx: bool) -> int:
+    flags = 0
+    if cs: flags |= QsciScintilla.SCFIND_MATCHCASE
+    if ww: flags |= QsciScintilla.SCFIND_WHOLEWORD
+    if rx: flags |= QsciScintilla.SCFIND_REGEXP | QsciScintilla.SCFIND_CXX11REGEX
+    return flags
+
+# ---------------- Settings ----------------
+class CachedSettings(QObject):
+    """QSettings front-end: reads are memoised, writes are batched into one flush."""
+    def __init__(self, org: str, app: str, parent: Optional[QObject] = None, flush_ms: int = 2000):
+        super().__init__(parent)
+        self._qs = QSettings(org, app); self._cache = {}; self._dirty = set()
+        self._flush_timer = QTimer(self); self._flush_timer.setSingleShot(True); self._flush_timer.setInterval(flush_ms)
+        self._flush_timer.timeout.connect(self.sync)
+
+    def value(self, key: str, default=None, typ=None):
+        if key not in self._cache:
+            self._cache[key] = self._qs.value(key, default) if typ is None else self._qs.value(key, default, typ)
+        return self._cache[key]
+
+    def setValue(self, key: str, value):
+        self._cache[key] = value; self._dirty.add(key); self._flush_timer.start()
+
+    def sync(self):
+        self._flush_timer.stop()
+        for k in self._dirty: self._qs.setValue(k, self._cache[k])
+        self._dirty.clear(); self._qs.sync()
+
 # ---------------- Data ----------------
 @dataclass
 class FileState:
@@ -333,20 +490,18 @@ class SciEditor(QsciScintilla):
                 self.markerAdd(line, self.MARK_BOOKMARK)
             self.bookmarkClicked.emit(line)
 
+    # Marker scans run inside Scintilla; a second call wraps around the buffer.
     def next_bookmark_line(self, from_line: int) -> Optional[int]:
-        maxl = self.lines()
-        for l in range(from_line + 1, maxl):
-            if self.markersAtLine(l) & (1 << self.MARK_BOOKMARK): return l
-        for l in range(0, from_line + 1):
-            if self.markersAtLine(l) & (1 << self.MARK_BOOKMARK): return l
-        return None
+        mask = 1 << self.MARK_BOOKMARK
+        l = self.SendScintilla(QsciScintilla.SCI_MARKERNEXT, from_line + 1, mask)
+        if l < 0: l = self.SendScintilla(QsciScintilla.SCI_MARKERNEXT, 0, mask)
+        return None if l < 0 else l
 
     def prev_bookmark_line(self, from_line: int) -> Optional[int]:
-        for l in range(from_line - 1, -1, -1):
-            if self.markersAtLine(l) & (1 << self.MARK_BOOKMARK): return l
-        for l in range(self.lines() - 1, from_line - 1, -1):
-            if self.markersAtLine(l) & (1 << self.MARK_BOOKMARK): return l
-        return None
+        mask = 1 << self.MARK_BOOKMARK
+        l = self.SendScintilla(QsciScintilla.SCI_MARKERPREVIOUS, from_line - 1, mask) if from_line > 0 else -1
+        if l < 0: l = self.SendScintilla(QsciScintilla.SCI_MARKERPREVIOUS, self.lines() - 1, mask)
+        return None if l < 0 else l
 
     def start_macro(self): self._macro.clear(); self._recording = True
     def stop_macro(self): self._recording = False
@@ -494,10 +649,26 @@ class EditorTab(QWidget):
 
 # ---------------- Main Window ----------------
 class MainWindow(QMainWindow):
+    _REQUIRED_ACTIONS = ("act_new","act_open","act_save","act_find","act_find_in_files","act_wrap",
+                         "act_eol_lf","act_macro_rec","act_run_python","act_dictation")
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle(APP_NAME); self.resize(1380, 880)
-        self.settings = QSettings(APP_ORG, APP_NAME)
+        self.settings = CachedSettings(APP_ORG, APP_NAME, self)
+        self._recent = list(self.settings.value("recent_files", [], list) or [])
+        self._find_cache = {}  # (editor id, pattern, flags) -> sorted match spans
+        self._session_seq = 0; self._last_session_hash = 0
+        self._loading: Dict[str, EditorTab] = {}  # abspath -> tab whose pooled read is still pending
+        # Tab context menu is built once and re-exec'd on every right-click
+        self._tab_menu = QMenu(self)
+        self._tab_act_close = self._tab_menu.addAction("Close")
+        self._tab_act_close_others = self._tab_menu.addAction("Close Others")
+        self._tab_act_close_all = self._tab_menu.addAction("Close All")
+        self._tab_act_clone_other = self._tab_menu.addAction("Clone to Other View")
+        # Session saves are coalesced: every trigger restarts the timer, one write per idle second
+        self._save_timer = QTimer(self); self._save_timer.setSingleShot(True); self._save_timer.setInterval(1000)
+        self._save_timer.timeout.connect(self._save_session_now)
         self.setUnifiedTitleAndToolBarOnMac(True)
 
         # Central: Split view with two tab bars
@@ -538,9 +709,9 @@ class MainWindow(QMainWindow):
         self.func_dock.list.itemActivated.connect(self._goto_function_item)
         self.results_dock.tree.itemDoubleClicked.connect(self._open_result_item)
 
-        # Timers & session
-        self.disk_timer = QTimer(self); self.disk_timer.timeout.connect(self._check_disk_changes); self.disk_timer.start(CHECK_DISK_MS)
-        self._load_session()
+        # Timers (session restore happens in _post_show_init, after the first paint)
+        self.disk_timer = QTimer(self); self.disk_timer.timeout.connect(self._check_disk_changes)
+        self._session_ready = False
 
         # Drag & drop
         self.setAcceptDrops(True)
@@ -548,7 +719,10 @@ class MainWindow(QMainWindow):
         # Audio input device (for dictation)
         self.mic_device_idx = int(self.settings.value('mic_device_idx', -1))
 
+    def _post_show_init(self):
+        self._load_session(); self._session_ready = True
         if self.tabs_left.count() == 0: self.new_file()
+        self.disk_timer.start(CHECK_DISK_MS)
 
     # Tabs setup
     def _setup_tabs(self, tabs: QTabWidget):
@@ -578,6 +752,7 @@ class MainWindow(QMainWindow):
         tab = EditorTab(None); ed = tab.editor
         ed.caretMovedX.connect(self._update_status_pos); ed.zoomChangedX.connect(lambda pct: self.zoom_label.setText(f"{pct}%"))
         ed.modificationChanged.connect(lambda m: self.mod_label.setText("MOD" if m else ""))
+        ed.textChanged.connect(self._find_cache.clear)
         tabs = self.tabs_right if right else self.tabs_left
         idx = tabs.addTab(tab, "Untitled"); tabs.setCurrentIndex(idx)
         self._update_status_all()
@@ -586,9 +761,14 @@ class MainWindow(QMainWindow):
         paths, _ = QFileDialog.getOpenFileNames(self, "Open Files", "", "All Files (*.*)")
         for p in paths: self._open_path(p)
 
-    def _open_path(self, path: str, in_other: bool=False):
+    def _open_path(self, path: str, in_other: bool=False, on_loaded=None):
         if not path: return
-        # Prevent duplicates
+        # Prevent duplicates, including tabs whose text is still being read
+        pending = self._loading.get(os.path.abspath(path))
+        if pending is not None:
+            for tabs in (self.tabs_left, self.tabs_right):
+                i = tabs.indexOf(pending)
+                if i >= 0: tabs.setCurrentIndex(i); return
         for tabs in (self.tabs_left, self.tabs_right):
             for i in range(tabs.count()):
                 w: EditorTab = tabs.widget(i)  # type: ignore
@@ -598,11 +778,18 @@ class MainWindow(QMainWindow):
         tab = EditorTab(path); ed = tab.editor
         ed.caretMovedX.connect(self._update_status_pos); ed.zoomChangedX.connect(lambda pct: self.zoom_label.setText(f"{pct}%"))
         ed.modificationChanged.connect(lambda m: self.mod_label.setText("MOD" if m else ""))
+        ed.textChanged.connect(self._find_cache.clear)
         tabs = self._other_tabs() if in_other else self._current_tabs()
         idx = tabs.addTab(tab, os.path.basename(path)); tabs.setCurrentIndex(idx)
         self._update_status_all()
         # Start async load
         busy = BusyIndicator(self.status, f"Opening {os.path.basename(path)}…")
+        key = os.path.abspath(path); self._loading[key] = tab
+        def loaded():
+            # The tab has no file_state.path until now; a session written before the last load
+            # lands would drop it, so saving waits (see _save_session_now) and is queued here
+            if self._loading.get(key) is tab: del self._loading[key]
+            if not self._loading: self._save_session()
         def worker_read(path: str):
             for enc in ("utf-8", "latin-1"):
                 try:
@@ -621,23 +808,25 @@ class MainWindow(QMainWindow):
             return {"ok": False, "error": "Unable to decode with UTF-8 or Latin-1."}
 
         def on_done(res):
-            busy.done()
+            busy.done(); loaded()
             if res.get("ok"):
                 text, enc, mtime = res["data"]
                 ed.setText(text)
                 ed.file_state.path = path; ed.file_state.encoding = enc; ed.file_state.mtime = mtime
                 ed.apply_lexer_for(path)
-                self._set_cur_tab_title(os.path.basename(path))
+                i = tabs.indexOf(tab)  # loads finish in any order; title the tab we created
+                if i >= 0: tabs.setTabText(i, os.path.basename(path))
                 self._add_recent(path)
+                if on_loaded: on_loaded(ed)
                 self._update_status_all(); self._update_function_list()
             else:
                 self._handle_error("Open file", res.get("error", "Unknown error"))
 
         def on_err(msg):
-            busy.done()
+            busy.done(); loaded()
             self._handle_error("Open file", msg)
 
-        run_async(self, worker_read, on_done, on_err, path)
+        run_pooled(self, worker_read, on_done, on_err, path)
 
     def save_file(self, save_as: bool=False):
         ed = self._editor()
@@ -691,10 +880,13 @@ class MainWindow(QMainWindow):
         self._open_path(ed.file_state.path)
 
     def closeEvent(self, e: QCloseEvent):
-        self._save_session(); super().closeEvent(e)
+        self._save_timer.stop(); self._save_session_now(); QThreadPool.globalInstance().waitForDone()
+        self.settings.sync(); super().closeEvent(e)
 
-    def _close_tab(self, tabs: QTabWidget, index: int):
+    def _close_tab(self, tabs: QTabWidget, index: int, _bulk: bool=False):
         tabs.removeTab(index)
+        if _bulk: return  # caller does the per-batch bookkeeping once
+        self._find_cache.clear(); self._save_session()
         if tabs.count() == 0 and tabs is self.tabs_left: self.new_file()
 
     def _set_cur_tab_title(self, title: str):
@@ -703,19 +895,23 @@ class MainWindow(QMainWindow):
 
     # Recent
     def _add_recent(self, path: str):
-        rec = self.settings.value("recent_files", [], list); abspath = os.path.abspath(path)
+        rec = self._recent; abspath = os.path.abspath(path)
+        if rec and rec[0] == abspath: return
         if abspath in rec: rec.remove(abspath)
-        rec.insert(0, abspath); rec = rec[:MAX_RECENTS]
+        rec.insert(0, abspath); del rec[MAX_RECENTS:]
         self.settings.setValue("recent_files", rec); self._rebuild_recents_menu()
 
     def _rebuild_recents_menu(self):
-        self.recent_menu.clear(); rec = self.settings.value("recent_files", [], list)
+        self.recent_menu.clear(); rec = self._recent
         if not rec: a = self.recent_menu.addAction("(Empty)"); a.setEnabled(False)
         else:
             for p in rec:
                 act = self.recent_menu.addAction(p)
                 act.triggered.connect(lambda _, path=p: self._open_path(path))
-            self.recent_menu.addSeparator(); self.recent_menu.addAction("Clear List", lambda: (self.settings.setValue("recent_files", []), self._rebuild_recents_menu()))
+            self.recent_menu.addSeparator(); self.recent_menu.addAction("Clear List", self._clear_recents)
+
+    def _clear_recents(self):
+        self._recent.clear(); self.settings.setValue("recent_files", []); self._rebuild_recents_menu()
 
     # Search/Replace helpers
     def _pos_from_linecol(self, text: str, line: int, col: int) -> int:
@@ -731,28 +927,45 @@ class MainWindow(QMainWindow):
         return len(lines)-1, 0
 
     def _find_in_text(self, ed: SciEditor, pattern: str, cs: bool, ww: bool, rx: bool, sel_only: bool, backwards: bool) -> bool:
-        text = ed.text()
+        if not (sel_only and ed.hasSelectedText()) and sci_can_search(pattern, rx):
+            # Native search: Scintilla scans its own buffer, no Python copy of the text.
+            if rx and ww: pattern = r"\b" + pattern + r"\b"
+            line, col = ed.getSelection()[:2] if backwards and ed.hasSelectedText() else ed.getCursorPosition()
+            return ed.findFirst(pattern, rx, cs, ww and not rx, True, not backwards, line, col, True, False, rx)
+        full = text = ed.text()
         if sel_only and ed.hasSelectedText():
             s = ed.selectedText().replace('\r\n', '\n')
             text = s
             l1, c1, _, _ = ed.getSelection()
-            start_pos = self._pos_from_linecol(ed.text(), l1, c1)
+            start_pos = self._pos_from_linecol(full, l1, c1)
         else:
             start_pos = self._pos_from_linecol(text, *ed.getCursorPosition())
         if not rx: pattern = re.escape(pattern)
         if ww: pattern = r"\b" + pattern + r"\b"
         flags = 0 if cs else re.IGNORECASE
         R = re.compile(pattern, flags | re.MULTILINE)
-        if backwards:
-            m = None
-            for mm in R.finditer(text, 0, start_pos): m = mm
+        if text is full:
+            # Match spans are computed once per (editor, pattern) and bisected on every
+            # find-next/prev until the buffer changes.
+            key = (id(ed), R.pattern, R.flags); spans = self._find_cache.get(key)
+            if spans is None: spans = self._find_cache[key] = [m.span() for m in R.finditer(text)]
+            if not spans: return False
+            if backwards: i = bisect.bisect_left(spans, (start_pos,)) - 1
+            else:
+                i = bisect.bisect_left(spans, (start_pos + 1 if ed.hasSelectedText() else start_pos,))
+                if i == len(spans): i = 0
+            s, e = spans[i]
         else:
-            st = start_pos + 1 if ed.hasSelectedText() else start_pos
-            m = R.search(text, st)
-        if not m: m = R.search(text, 0)
-        if not m: return False
-        s, e = m.start(), m.end()
-        l1, c1 = self._linecol_from_pos(ed.text(), s); l2, c2 = self._linecol_from_pos(ed.text(), e)
+            if backwards:
+                m = None
+                for mm in R.finditer(text, 0, start_pos): m = mm
+            else:
+                st = start_pos + 1 if ed.hasSelectedText() else start_pos
+                m = R.search(text, st)
+            if not m: m = R.search(text, 0)
+            if not m: return False
+            s, e = m.start(), m.end()
+        l1, c1 = self._linecol_from_pos(full, s); l2, c2 = self._linecol_from_pos(full, e)
         ed.setSelection(l1, c1, l2, c2); ed.ensureLineVisible(l1); return True
 
     def _replace_one(self, pat, rep, cs, ww, rx, sel_only):
@@ -763,15 +976,41 @@ class MainWindow(QMainWindow):
 
     def _replace_all(self, pat, rep, cs, ww, rx, sel_only):
         ed = self._editor(); 
-        if not ed: return
-        text = ed.text()
+        if not ed or not pat: return
+        if not (sci_can_search(pat, rx) and sci_can_replace(rep, rx)):
+            text = ed.text()
+            if sel_only and ed.hasSelectedText():
+                l1, c1, l2, c2 = ed.getSelection(); sel_text = ed.selectedText().replace('\r\n','\n')
+                R = re.compile(pat if rx else re.escape(pat), 0 if cs else re.IGNORECASE | re.MULTILINE)
+                new_sel = R.sub(rep, sel_text); ed.setSelection(l1,c1,l2,c2); ed.replaceSelectedText(new_sel)
+            else:
+                R = re.compile(pat if rx else re.escape(pat), 0 if cs else re.IGNORECASE | re.MULTILINE)
+                ed.setText(R.sub(rep, text))
+            return
+        # Target-based replace: Scintilla edits its buffer in place, one undo step overall.
+        if rx and ww: pat = r"\b" + pat + r"\b"
+        pat_b = pat.encode("utf-8"); rep_b = rep.encode("utf-8")
         if sel_only and ed.hasSelectedText():
-            l1, c1, l2, c2 = ed.getSelection(); sel_text = ed.selectedText().replace('\r\n','\n')
-            R = re.compile(pat if rx else re.escape(pat), 0 if cs else re.IGNORECASE | re.MULTILINE)
-            new_sel = R.sub(rep, sel_text); ed.setSelection(l1,c1,l2,c2); ed.replaceSelectedText(new_sel)
+            start, end = ed.SendScintilla(QsciScintilla.SCI_GETSELECTIONSTART), ed.SendScintilla(QsciScintilla.SCI_GETSELECTIONEND)
         else:
-            R = re.compile(pat if rx else re.escape(pat), 0 if cs else re.IGNORECASE | re.MULTILINE)
-            ed.setText(R.sub(rep, text))
+            start, end = 0, ed.length()
+        replace_msg = QsciScintilla.SCI_REPLACETARGETRE if rx else QsciScintilla.SCI_REPLACETARGET
+        ed.SendScintilla(QsciScintilla.SCI_SETSEARCHFLAGS, sci_search_flags(cs, ww and not rx, rx))
+        ed.beginUndoAction()
+        try:
+            while start <= end:
+                ed.SendScintilla(QsciScintilla.SCI_SETTARGETSTART, start); ed.SendScintilla(QsciScintilla.SCI_SETTARGETEND, end)
+                found = ed.SendScintilla(QsciScintilla.SCI_SEARCHINTARGET, len(pat_b), pat_b)
+                if found < 0: break
+                matched = ed.SendScintilla(QsciScintilla.SCI_GETTARGETEND) - found
+                replaced = ed.SendScintilla(replace_msg, len(rep_b), rep_b)
+                end += replaced - matched; start = found + replaced
+                if matched == 0:
+                    # Empty regex match: step past the next character so the loop advances.
+                    if start >= end: break
+                    start = ed.SendScintilla(QsciScintilla.SCI_POSITIONAFTER, start)
+        finally:
+            ed.endUndoAction()
 
     def _find_next(self, pat, cs, ww, rx, sel_only, backwards):
         ed = self._editor(); 
@@ -789,29 +1028,40 @@ class MainWindow(QMainWindow):
         def worker(root, masks, text, case, whole, regex, recursive):
             import re, fnmatch
             mask_list = [m.strip() for m in masks.split(";") if m.strip()]
+            # fnmatch.fnmatch() case-folds like the host filesystem; mirror that once here.
+            mflags = re.IGNORECASE if os.path.normcase("A") == "a" else 0
+            mask_res = [re.compile(fnmatch.translate(m), mflags) for m in mask_list]
             flags = 0 if case else re.IGNORECASE
             if not regex: text = re.escape(text)
             if whole: text = r"\b" + text + r"\b"
             R = re.compile(text, flags | re.MULTILINE)
+            def walk(top):
+                # scandir reports entry types from the directory listing, so no stat per file
+                try:
+                    with os.scandir(top) as it:
+                        for e in it:
+                            if e.is_dir(follow_symlinks=False):
+                                if recursive: yield from walk(e.path)
+                            elif e.is_file(follow_symlinks=False):
+                                yield e.name, e.path
+                except OSError:
+                    return
             results = []
             try:
-                p = Path(root)
-                if not p.exists():
+                if not os.path.isdir(root):
                     return {"ok": False, "error": f"Folder not found: {root}"}
-                it = p.rglob("*") if recursive else p.glob("*")
-                for f in it:
-                    if f.is_file():
-                        if mask_list and not any(fnmatch.fnmatch(f.name, m) for m in mask_list): 
-                            continue
-                        try:
-                            data = f.read_text(encoding="utf-8", errors="ignore")
-                        except Exception:
-                            continue
-                        for m in R.finditer(data):
-                            line = data.count("\n", 0, m.start()) + 1
-                            col = m.start() - (data.rfind("\n", 0, m.start()) + 1)
-                            snippet = data[max(0, m.start()-40):m.end()+40].replace("\n", " ")
-                            results.append((str(f), line, col+1, snippet))
+                for name, path in walk(root):
+                    if mask_res and not any(r.match(name) for r in mask_res):
+                        continue
+                    try:
+                        with open(path, encoding="utf-8", errors="ignore") as fh: data = fh.read()
+                    except Exception:
+                        continue
+                    for m in R.finditer(data):
+                        line = data.count("\n", 0, m.start()) + 1
+                        col = m.start() - (data.rfind("\n", 0, m.start()) + 1)
+                        snippet = data[max(0, m.start()-40):m.end()+40].replace("\n", " ")
+                        results.append((path, line, col+1, snippet))
                 return {"ok": True, "data": results}
             except re.error as e:
                 return {"ok": False, "error": f"Regex error: {e}"}
@@ -823,7 +1073,8 @@ class MainWindow(QMainWindow):
             if res.get("ok"):
                 self.results_dock.clear(); self.results_dock.show()
                 for (path, line, col, snippet) in res["data"]:
-                    self.results_dock.tree.addTopLevelItem(QTreeWidgetItem([path, str(line), str(col), snippet]))
+                    it = QTreeWidgetItem([path, str(line), str(col), snippet]); it.setData(0, Qt.ItemDataRole.UserRole, (path, line, col))
+                    self.results_dock.tree.addTopLevelItem(it)
             else:
                 self._handle_error("Find in Files", res.get("error","Unknown error"))
 
@@ -834,10 +1085,10 @@ class MainWindow(QMainWindow):
         run_async(self, worker, on_done, on_err, root, masks, text, case, whole, regex, recursive)
 
     def _open_result_item(self, item: QTreeWidgetItem, _col: int):
-        path, line, col = item.text(0), int(item.text(1)), int(item.text(2))
+        path, line, col = item.data(0, Qt.ItemDataRole.UserRole)
         self._open_path(path); ed = self._editor()
         if not ed: return
-        ed.setCursorPosition(line-1, col-1); ed.ensureLineVisible(line-1); ed.setSelection(line-1, col-1, line-1, col)
+        ed.setSelection(line-1, col-1, line-1, col)  # SCI_SETSEL scrolls the caret into view
 
     # Function list
     def _update_function_list(self):
@@ -863,7 +1114,7 @@ class MainWindow(QMainWindow):
             self.func_dock.hide()
 
     def _goto_function_item(self, item: QListWidgetItem):
-        ln = int(item.data(Qt.ItemDataRole.UserRole)); ed = self._editor()
+        ln = item.data(Qt.ItemDataRole.UserRole); ed = self._editor()
         if not ed: return
         ed.setCursorPosition(ln-1, 0); ed.ensureLineVisible(ln-1)
 
@@ -891,7 +1142,7 @@ class MainWindow(QMainWindow):
         self.zoom_label.setText(f"{ed.zoom_percent()}%"); self.mod_label.setText("MOD" if ed.isModified() else "")
 
     def _on_current_changed(self, tabs: QTabWidget):
-        self._update_status_all(); self._update_function_list()
+        self._update_status_all(); self._update_function_list(); self._save_session()
 
     # Menus & toolbar
     def _make_actions(self):
@@ -1047,8 +1298,11 @@ class MainWindow(QMainWindow):
         ed = self._editor(); 
         if not ed: return
         try:
-            data = ed.text().encode(enc, errors=("ignore" if lossy else "strict")).decode(enc, errors="strict")
-            ed.setText(data); ed.file_state.encoding = enc; self.enc_label.setText(enc.upper())
+            src = ed.text()
+            data = src.encode(enc, errors=("ignore" if lossy else "strict")).decode(enc, errors="strict")
+            if data != src:  # lossless round trip: nothing to reload into the widget
+                ed.beginUndoAction(); ed.setText(data); ed.endUndoAction()
+            ed.file_state.encoding = enc; self.enc_label.setText(enc.upper())
         except UnicodeEncodeError as e:
             self._handle_error("Encoding conversion", f"Cannot encode text to {enc}: {e}")
         except UnicodeDecodeError as e:
@@ -1077,18 +1331,24 @@ class MainWindow(QMainWindow):
         while len(acts) > 3:
             self.m_plugins.removeAction(acts[-1]); acts = self.m_plugins.actions()
         self.m_plugins.addSeparator()
+        # Only list plugins here; each module is imported the first time its submenu opens.
         for pyf in sorted(Path(PLUGINS_DIR).glob("*.py")):
-            try:
-                spec = importlib.util.spec_from_file_location(pyf.stem, str(pyf))
-                mod = importlib.util.module_from_spec(spec); assert spec and spec.loader
-                spec.loader.exec_module(mod)  # type: ignore
-                submenu = self.m_plugins.addMenu(pyf.stem)
-                if hasattr(mod, "register"):
-                    mod.register(self, submenu)  # type: ignore
-                else:
-                    submenu.addAction("(no register(app, menu) found)").setEnabled(False)
-            except Exception as e:
-                self.m_plugins.addAction(f"{pyf.stem} (load error: {e})").setEnabled(False)
+            submenu = self.m_plugins.addMenu(pyf.stem)
+            submenu.addAction("Loading…").setEnabled(False)
+            submenu.aboutToShow.connect(lambda p=pyf, m=submenu: self._load_plugin(p, m))
+
+    def _load_plugin(self, pyf: Path, submenu: QMenu):
+        submenu.aboutToShow.disconnect(); submenu.clear()
+        try:
+            spec = importlib.util.spec_from_file_location(pyf.stem, str(pyf))
+            mod = importlib.util.module_from_spec(spec); assert spec and spec.loader
+            spec.loader.exec_module(mod)  # type: ignore
+            if hasattr(mod, "register"):
+                mod.register(self, submenu)  # type: ignore
+            else:
+                submenu.addAction("(no register(app, menu) found)").setEnabled(False)
+        except Exception as e:
+            submenu.addAction(f"(load error: {e})").setEnabled(False)
 
     # Tools
     def _run_python_current(self):
@@ -1107,12 +1367,19 @@ class MainWindow(QMainWindow):
     def _run_command_async(self, cmd: str, cwd: Optional[str]=None):
         self.console_dock.show(); self.console_dock.raise_(); self.console_dock.out.append(f"$ {cmd}\n")
         busy = BusyIndicator(self.status, "Running command…")
+        emitter = _LineEmitter(); emitter.lineReady.connect(self.console_dock.out.append)
         def worker(cmd, cwd):
             try:
-                proc = subprocess.Popen(cmd, cwd=cwd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
-                out, _ = proc.communicate()
-                rc = proc.returncode
-                return {"ok": True, "data": (rc, out)}
+                proc = subprocess.Popen(cmd, cwd=cwd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
+                # Stream output to the console in batches instead of buffering it all until exit
+                pending = []
+                for line in proc.stdout:
+                    pending.append(line)
+                    if len(pending) >= 32:
+                        emitter.lineReady.emit("".join(pending).rstrip("\n")); pending.clear()
+                if pending: emitter.lineReady.emit("".join(pending).rstrip("\n"))
+                proc.stdout.close(); rc = proc.wait()
+                return {"ok": True, "data": rc}
             except FileNotFoundError:
                 return {"ok": False, "error": "Command not found"}
             except Exception as e:
@@ -1121,8 +1388,7 @@ class MainWindow(QMainWindow):
         def on_done(res):
             busy.done("Command finished")
             if res.get("ok"):
-                rc, out = res["data"]
-                self.console_dock.out.append(out)
+                rc = res["data"]
                 if rc != 0:
                     self._handle_error("External command", f"Process exited with code {rc}")
             else:
@@ -1155,24 +1421,28 @@ class MainWindow(QMainWindow):
                 q.put(indata.copy())
             # Ambient calibration
             self.status.showMessage("🎙️ Dictation: calibrating…", 2000); QApplication.processEvents()
-            ambient_chunks = []
+            # Energy is compared as mean-square against squared thresholds (no sqrt per block);
+            # squares go into a reused int64 scratch buffer instead of a float32 copy.
+            sq = np.empty(blocksize, dtype=np.int64)
+            def sum_sq(arr) -> int:
+                nonlocal sq
+                if len(arr) > len(sq): sq = np.empty(len(arr), dtype=np.int64)
+                out = sq[:len(arr)]; np.multiply(arr, arr, out=out, dtype=np.int64)
+                return int(out.sum())
+            s_amb = 0; n_amb = 0
+            # One stream serves calibration and capture; speech is written into a flat
+            # preallocated buffer rather than a growing bytearray.
+            cap = int(max_ms * samplerate / 1000); buf = np.empty(cap, dtype=np.int16); cur = 0
             with sd.InputStream(channels=1, samplerate=samplerate, dtype='int16', blocksize=blocksize, callback=callback, device=device):
                 target_frames = int((ambient_ms/1000) * samplerate)
-                got = 0
-                while got < target_frames:
-                    ambient_chunks.append(q.get(timeout=2))
-                    got += len(ambient_chunks[-1])
-            if ambient_chunks:
-                amb = np.concatenate(ambient_chunks).astype(np.int16)
-                energy_threshold = float(np.sqrt(np.mean(amb.astype(np.float32)**2))) * 3.0
-            else:
-                energy_threshold = 500.0
-
-            # Listen until silence
-            q = queue.Queue()
-            started = False; start_time = time.time(); last_voice_ms = 0
-            collected = bytearray()
-            with sd.InputStream(channels=1, samplerate=samplerate, dtype='int16', blocksize=blocksize, callback=callback, device=device):
+                while n_amb < target_frames:
+                    arr = q.get(timeout=2).reshape(-1)
+                    s_amb += sum_sq(arr); n_amb += len(arr)
+                energy_threshold = (s_amb / n_amb) ** 0.5 * 3.0 if n_amb else 500.0
+                thr2 = energy_threshold ** 2; keep2 = (energy_threshold * 0.6) ** 2
+
+                # Listen until silence
+                started = False; start_time = time.time(); last_voice_ms = 0
                 self.status.showMessage("🎙️ Dictation: listening…", 3000); QApplication.processEvents()
                 while True:
                     try:
@@ -1181,24 +1451,25 @@ class MainWindow(QMainWindow):
                         if not started and (time.time() - start_time) * 1000 > start_timeout_ms:
                             raise TimeoutError("No speech detected (start timeout).")
                         continue
-                    arr = data.reshape(-1).astype(np.int16)
-                    rms = float(np.sqrt(np.mean(arr.astype(np.float32)**2)))
+                    arr = data.reshape(-1)
+                    ms = sum_sq(arr) / len(arr) if len(arr) else 0.0
                     now_ms = (time.time() - start_time) * 1000
-                    if not started and rms >= energy_threshold:
+                    if not started and ms >= thr2:
                         started = True; last_voice_ms = now_ms
-                        collected.extend(arr.tobytes())
-                    elif started:
-                        collected.extend(arr.tobytes())
-                        if rms >= energy_threshold * 0.6:
-                            last_voice_ms = now_ms
+                    elif started and ms >= keep2:
+                        last_voice_ms = now_ms
+                    if started:
+                        n = min(len(arr), cap - cur); buf[cur:cur+n] = arr[:n]; cur += n
+                        if cur >= cap:
+                            break
                     if started and (now_ms - last_voice_ms) > silence_ms:
                         break
                     if now_ms > max_ms:
                         break
 
-            if not collected:
+            if not cur:
                 raise TimeoutError("Nothing captured from microphone.")
-            audio = sr.AudioData(bytes(collected), samplerate, 2)
+            audio = sr.AudioData(buf[:cur].tobytes(), samplerate, 2)
             self.status.showMessage("🧠 Transcribing…", 3000); QApplication.processEvents()
             text = recognizer.recognize_google(audio)
             ed = self._editor()
@@ -1250,9 +1521,7 @@ class MainWindow(QMainWindow):
     # Self-test
     def _self_test(self):
         checks = [
-            ("Actions", all(hasattr(self, n) for n in [
-                "act_new","act_open","act_save","act_find","act_find_in_files","act_wrap",
-                "act_eol_lf","act_macro_rec","act_run_python","act_dictation"])),
+            ("Actions", self.__dict__.keys() >= set(self._REQUIRED_ACTIONS)),
             ("Editor present", isinstance(self._editor(), SciEditor)),
             ("Results dock", hasattr(self, "results_dock")),
             ("Function dock", hasattr(self, "func_dock")),
@@ -1267,21 +1536,20 @@ class MainWindow(QMainWindow):
 
     # Tab context menu
     def _tab_context_menu(self, tabs: QTabWidget, pos: QPoint):
-        index = tabs.tabBar().tabAt(pos); 
+        tabbar = tabs.tabBar(); index = tabbar.tabAt(pos)
         if index < 0: return
-        menu = QMenu(self)
-        act_close = menu.addAction("Close")
-        act_close_others = menu.addAction("Close Others")
-        act_close_all = menu.addAction("Close All")
-        act_clone_other = menu.addAction("Clone to Other View")
-        act = menu.exec(tabs.mapToGlobal(pos))
+        act_close, act_close_others = self._tab_act_close, self._tab_act_close_others
+        act_close_all, act_clone_other = self._tab_act_close_all, self._tab_act_clone_other
+        act = self._tab_menu.exec(tabs.mapToGlobal(pos))
         if act == act_close: self._close_tab(tabs, index)
-        elif act == act_close_others:
-            for i in reversed(range(tabs.count())):
-                if i != index: self._close_tab(tabs, i)
-        elif act == act_close_all:
-            for i in reversed(range(tabs.count())):
-                self._close_tab(tabs, i)
+        elif act in (act_close_others, act_close_all):
+            # One relayout/repaint and one currentChanged for the whole batch
+            with suspend_updates(tabs):
+                for i in reversed(range(tabs.count())):
+                    if act == act_close_all or i != index: self._close_tab(tabs, i, _bulk=True)
+                self._find_cache.clear()
+                if tabs.count() == 0 and tabs is self.tabs_left: self.new_file()
+            self._on_current_changed(tabs)
         elif act == act_clone_other:
             w: EditorTab = tabs.widget(index)  # type: ignore
             path = w.editor.file_state.path
@@ -1290,45 +1558,68 @@ class MainWindow(QMainWindow):
 
     # Session
     def _save_session(self):
-        sess = {"left": [], "right": [], "active": "left" if self._current_tabs() is self.tabs_left else "right"}
+        self._save_timer.start()
+
+    def _save_session_now(self):
+        # Never overwrite a session that was not restored yet, or while a tab's read is pending
+        if not self._session_ready or self._loading: return
+        sess = {"version": SESSION_VERSION, "active": "left" if self._current_tabs() is self.tabs_left else "right"}
         for label, tabs in (("left", self.tabs_left), ("right", self.tabs_right)):
-            for i in range(tabs.count()):
-                w: EditorTab = tabs.widget(i)  # type: ignore
-                ed = w.editor; l, c = ed.getCursorPosition()
-                sess[label].append({"path": ed.file_state.path, "encoding": ed.file_state.encoding, "eol": ed.eol_str(), "line": l, "col": c})
-        try: Path(SESSION_FILE).write_text(json.dumps(sess, indent=2))
-        except Exception: pass
+            paths, encs, eols, lines, cols = side = tuple([] for _ in SESSION_COLUMNS)
+            n = tabs.count(); widget = tabs.widget
+            for i in range(n):
+                ed = widget(i).editor; fs = ed.file_state; l, c = ed.getCursorPosition()
+                paths.append(fs.path); encs.append(fs.encoding); eols.append(ed.eol_str())
+                lines.append(l); cols.append(c)
+            sess[label] = dict(zip(SESSION_COLUMNS, side))
+        try: buf = pack_session(sess)
+        except Exception: return
+        h = hash(buf)
+        if h == self._last_session_hash: return  # nothing changed since the last write
+        self._last_session_hash = h; self._session_seq += 1
+        QThreadPool.globalInstance().start(_SessionWriter(SESSION_FILE, buf, self._session_seq))
 
     def _load_session(self):
-        try: data = json.loads(Path(SESSION_FILE).read_text())
+        try: data = unpack_session(Path(SESSION_FILE).read_bytes())
         except Exception: data = None
         if not data: return
-        for label, tabs in (("left", self.tabs_left), ("right", self.tabs_right)):
-            for ent in data.get(label, []):
-                path = ent.get("path")
-                if path and os.path.exists(path):
-                    self._open_path(path, in_other=(label=="right"))
-                    ed = self._editor()
-                    if ed:
-                        ed.set_eol(ent.get("eol","LF")); ed.file_state.encoding = ent.get("encoding","utf-8")
-                        ed.setCursorPosition(int(ent.get("line",0)), int(ent.get("col",0)))
+        rows = {label: session_entries(data, label) for label in ("left", "right")}
+        exists = existing_files(r[0] for side in rows.values() for r in side)
+        # Restore every tab under one relayout; currentChanged is replayed once at the end
+        # Reads run in parallel on the pool; saved state is applied to each editor once its text is in
+        def restore(ed, enc, eol, line, col):
+            ed.set_eol(eol or "LF"); ed.file_state.encoding = enc or "utf-8"
+            ed.setCursorPosition(int(line), int(col))
+        open_path = self._open_path
+        with suspend_updates(self.tabs_left, self.tabs_right):
+            for label in ("left", "right"):
+                in_other = label == "right"
+                for path, enc, eol, line, col in rows[label]:
+                    if path in exists:
+                        open_path(path, in_other=in_other, on_loaded=lambda ed, a=(enc, eol, line, col): restore(ed, *a))
         self.tabs_right.setVisible(self.tabs_right.count() > 0)
+        self._on_current_changed(self.tabs_left)
 
     # Drag & Drop
     def dragEnterEvent(self, e):
         if e.mimeData().hasUrls(): e.acceptProposedAction()
     def dropEvent(self, e):
-        for url in e.mimeData().urls():
-            p = url.toLocalFile()
-            if p: self._open_path(p)
+        paths = [p for p in (url.toLocalFile() for url in e.mimeData().urls()) if p]
+        if not paths: return
+        tabs = self._current_tabs()
+        with suspend_updates(tabs):
+            for p in paths: self._open_path(p)
+        self._on_current_changed(tabs)
 
 # ---------------- Main ----------------
 def main():
     app = QApplication(sys.argv)
     app.setOrganizationName(APP_ORG); app.setApplicationName(APP_NAME)
-    base_font = QFont("SF Pro Text", 13) if "SF Pro Text" in QFontDatabase.families() else app.font()
+    base_font = QFont("SF Pro Text", 13) if QFontDatabase.hasFamily("SF Pro Text") else app.font()
     app.setFont(base_font)
+    QThreadPool.globalInstance().setMaxThreadCount(min(8, os.cpu_count() or 1))
     w = MainWindow(); w.show()
+    QTimer.singleShot(0, w._post_show_init)
     sys.exit(app.exec())
 
 if __name__ == "__main__":
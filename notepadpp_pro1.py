@@ -29,12 +29,14 @@
 #   python notepadpp_full_pro.py
 
 from __future__ import annotations
-import os, sys, re, json, fnmatch, importlib.util, subprocess, shlex, time
+import os, sys, re, json, bisect, codecs, ctypes, fnmatch, mmap, importlib.util, subprocess, shlex, threading, time
+from collections import deque
 from dataclasses import dataclass
-from typing import Optional, List, Tuple
+from functools import lru_cache
+from typing import Optional, List, Tuple, Dict
 from pathlib import Path
 
-from PyQt6.QtCore import Qt, QSettings, QSize, QTimer, QEvent, pyqtSignal, QPoint
+from PyQt6.QtCore import Qt, QSettings, QSize, QTimer, QEvent, pyqtSignal, QPoint, QObject, QRunnable, QThreadPool, QFileSystemWatcher
 from PyQt6.QtGui import (
     QAction, QKeySequence, QCloseEvent, QFont, QFontDatabase, QColor, QIcon, QGuiApplication
 )
@@ -44,17 +46,198 @@ from PyQt6.QtWidgets import (
     QHeaderView, QDialog, QGridLayout, QLineEdit, QCheckBox, QPushButton,
     QHBoxLayout, QListWidget, QListWidgetItem, QMenu, QSplitter, QTextEdit, QStyle, QInputDialog
 )
-from PyQt6.Qsci import (
-    QsciScintilla, QsciLexerPython, QsciLexerCPP, QsciLexerHTML, QsciLexerJSON,
-    QsciLexerJavaScript, QsciLexerJava, QsciLexerBash, QsciLexerFortran, QsciLexerFortran77
-)
+from PyQt6 import Qsci
+from PyQt6.Qsci import QsciScintilla, QsciLexer
 
 APP_ORG = "OpenDev"
 APP_NAME = "Notepad++ Pro (PyQt)"
 SESSION_FILE = str(Path.home() / ".npp_pro_session.json")
 PLUGINS_DIR = str(Path(__file__).parent / "plugins")
-CHECK_DISK_MS = 2000
 MAX_RECENTS = 20
+BIG_FILE_BYTES = 2_000_000  # above this, open without a lexer, caret-line or indent guides
+
+# ---------------- Search helpers ----------------
+@lru_cache(maxsize=256)
+def _compile_re(pattern: str, flags: int) -> re.Pattern:
+    return re.compile(pattern, flags)
+
+@lru_cache(maxsize=512)
+def _build_pattern(pat: str, rx: bool, ww: bool) -> str:
+    p = pat if rx else re.escape(pat)
+    return rf"\b{p}\b" if ww else p
+
+_EOL_RE = re.compile(r"\r\n?|\n")  # Scintilla's line breaks
+
+# Escapes first, so "\." is one token and "\\." is an escaped backslash then a bare dot
+_RX_TOKEN = re.compile(r"\\.|\[\^|\(\?|\.", re.S)
+
+def bytes_safe(pattern: str) -> bool:
+    """True if the pattern finds the same spans as a bytes regex over UTF-8 as it does as str.
+    Bytes mode reads \\w \\b \\s \\d, '.', negated classes and \\x escapes per byte/ASCII,
+    and rejects (?u) and \\N{...}; any of those means the text has to be decoded."""
+    if not pattern.isascii(): return False
+    for m in _RX_TOKEN.finditer(pattern):
+        t = m.group()
+        if t[0] != "\\" or t[1] in "wWbBsSdDNuUx0123456789": return False
+    return True
+
+try:
+    import hyperscan  # optional: fast reject of non-matching files in Find in Files
+except ImportError:
+    hyperscan = None
+try:
+    import pcre2  # optional: JIT-compiled matching for Find in Files
+except ImportError:
+    pcre2 = None
+
+# ---------------- Find in Files ----------------
+def iter_tree(root: str, recursive: bool):
+    """(name, path) of regular files under root; scandir supplies entry types, so no stat per file."""
+    try:
+        with os.scandir(root) as it:
+            for e in it:
+                if e.is_dir(follow_symlinks=False):
+                    if recursive: yield from iter_tree(e.path, True)
+                elif e.is_file(follow_symlinks=False):
+                    yield e.name, e.path
+    except OSError:
+        return
+
+@lru_cache(maxsize=64)
+def mask_pattern(masks: str) -> Optional[re.Pattern]:
+    """All `;`-separated globs folded into one alternation, so each entry costs a single match().
+    None means no masks, i.e. every file passes."""
+    globs = [m.strip() for m in masks.split(";") if m.strip()]
+    if not globs: return None
+    flags = re.IGNORECASE if os.path.normcase("A") == "a" else 0
+    return re.compile("|".join(f"(?:{fnmatch.translate(g)})" for g in globs), flags)
+
+def _willneed(path: str):
+    try: fd = os.open(path, os.O_RDONLY)
+    except OSError: return
+    try: os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    except OSError: pass
+    finally: os.close(fd)
+
+def readahead(files, depth: int = 32):
+    """Pass (name, path) items through while asking the kernel to start reading the next
+    `depth` files, so their disk reads overlap with scanning. No-op without posix_fadvise."""
+    if not hasattr(os, "posix_fadvise"):
+        yield from files; return
+    window = deque()
+    for item in files:
+        _willneed(item[1]); window.append(item)
+        if len(window) > depth: yield window.popleft()
+    yield from window
+
+def hs_prefilter(pattern: bytes, flags: int):
+    """Hyperscan check "does this buffer match at all?" for a bytes pattern, or None when
+    hyperscan is missing or rejects the pattern. Match positions always come from `re`;
+    Hyperscan reports overlapping matches, so it only decides which files get scanned."""
+    if hyperscan is None: return None
+    hs_flags = hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_MULTILINE | hyperscan.HS_FLAG_ALLOWEMPTY
+    if flags & re.IGNORECASE: hs_flags |= hyperscan.HS_FLAG_CASELESS
+    db = hyperscan.Database()
+    try: db.compile(expressions=[pattern], ids=[0], elements=1, flags=[hs_flags])
+    except Exception: return None  # lookarounds, backrefs, Python-only syntax
+    def matches(buf) -> bool:
+        hit = []
+        try: db.scan(buf, match_event_handler=lambda *_: hit.append(True))
+        except Exception: return True  # let re decide
+        return bool(hit)
+    return matches
+
+@lru_cache(maxsize=32)
+def jit_pattern(pattern: bytes, flags: int):
+    """pcre2 pattern JIT-compiled once per (pattern, flags), or None when pcre2 is missing,
+    rejects the pattern, or cannot scan an mmap; callers then keep the `re` pattern."""
+    if pcre2 is None: return None
+    try:
+        p = pcre2.compile((b"(?i)" if flags & re.IGNORECASE else b"") + b"(?m)" + pattern)
+        p.jit_compile()
+        with mmap.mmap(-1, 1) as probe: list(p.scan(probe))
+    except Exception:
+        return None
+    return p
+
+def scan_file(path: str, R, prefilter=None):
+    """(line, col, snippet) for each match of R. A bytes pattern (an re or pcre2 pattern)
+    scans a read-only mmap of the file; a str pattern, one that isn't bytes_safe, the decoded text."""
+    if isinstance(R, re.Pattern) and isinstance(R.pattern, str):
+        yield from _scan_text(path, R); return
+    try: fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    except OSError: return
+    try: mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    except (ValueError, OSError): return  # empty or not mappable
+    finally: os.close(fd)
+    with mm:
+        if prefilter and not prefilter(mm): return
+        line, last = 1, 0
+        for m in (R.scan(mm) if hasattr(R, "scan") else R.finditer(mm)):  # pcre2 | re
+            s, e = m.start(), m.end()
+            line += mm[last:s].count(b"\n"); last = s
+            ls = mm.rfind(b"\n", 0, s) + 1
+            col = len(mm[ls:s].decode("utf-8", "ignore")) + 1
+            snippet = mm[max(0, s-40):e+40].decode("utf-8", "ignore").replace("\n", " ")
+            yield line, col, snippet
+
+def files_pattern(text: str, case: bool, whole: bool, regex: bool) -> re.Pattern:
+    """The Find in Files query compiled for scan_file. Byte-safe patterns compile as bytes and
+    scan each file's raw UTF-8; any other (\\w, \\b, '.', non-ASCII case folding), or one only
+    valid as str, stays str and scans the decoded text. Raises re.error for a bad regex."""
+    flags = (0 if case else re.IGNORECASE) | re.MULTILINE
+    if not regex: text = re.escape(text)
+    if whole: text = r"\b" + text + r"\b"
+    R = re.compile(text, flags)
+    if bytes_safe(text):
+        try: return re.compile(text.encode("ascii"), flags)
+        except re.error: pass
+    return R
+
+def _scan_text(path: str, R: re.Pattern):
+    try:
+        with open(path, "rb") as f: text = f.read().decode("utf-8", "ignore")
+    except OSError: return
+    line, last = 1, 0
+    for m in R.finditer(text):
+        s, e = m.span()
+        line += text.count("\n", last, s); last = s
+        ls = text.rfind("\n", 0, s) + 1
+        yield line, s - ls + 1, text[max(0, s-40):e+40].replace("\n", " ")
+
+class _SearchSignals(QObject):
+    results = pyqtSignal(list)
+    error = pyqtSignal(str)
+    finished = pyqtSignal(int)
+
+class SearchRunnable(QRunnable):
+    """Find in Files scan on a pool thread; matches are posted back in batches.
+    Auto-deleted: the pool owns it until run() returns, so a superseded job needs no reference."""
+    BATCH = 500
+
+    def __init__(self, root: str, recursive: bool, mask_re: Optional[re.Pattern], R, prefilter=None):
+        super().__init__()
+        self.signals = _SearchSignals(); self._cancel = threading.Event()
+        self._args = (root, recursive, mask_re, R, prefilter)
+
+    def cancel(self): self._cancel.set()
+
+    def run(self):
+        root, recursive, mask_re, R, pre = self._args
+        batch, total = [], 0
+        try:
+            files = ((n, p) for n, p in iter_tree(root, recursive) if mask_re is None or mask_re.match(n))
+            for _name, path in readahead(files):
+                if self._cancel.is_set(): return
+                for line, col, snippet in scan_file(path, R, pre):
+                    batch.append((path, line, col, snippet))
+                    if len(batch) >= self.BATCH:
+                        self.signals.results.emit(batch); total += len(batch); batch = []
+            if batch: self.signals.results.emit(batch); total += len(batch)
+        except Exception as e:  # an exception escaping run() would abort the app
+            self.signals.error.emit(str(e))
+        finally:
+            self.signals.finished.emit(total)
 
 # ---------------- Fonts & Theme ----------------
 def best_mono_font(size: int = 13) -> QFont:
@@ -194,7 +377,39 @@ class FileState:
     eol: str = "LF"
     mtime: Optional[float] = None
 
+def write_text_atomic(path: str, text: str, encoding: str, chunk: int = 1 << 20):
+    """Encode `text` a chunk at a time into a sibling temp file, then swap it over `path`.
+    Peak extra memory is one chunk, and a failed save leaves the old file intact.
+    A symlink is followed: its target is replaced and the link itself kept."""
+    path = os.path.realpath(path)
+    tmp = f"{path}.{os.getpid()}.tmp"; enc = codecs.getincrementalencoder(encoding)("strict")
+    try:
+        with open(tmp, "wb", buffering=chunk) as f:
+            for i in range(0, len(text), chunk): f.write(enc.encode(text[i:i+chunk]))
+            f.write(enc.encode("", final=True))
+        try: os.chmod(tmp, os.stat(path).st_mode & 0o7777)
+        except OSError: pass
+        os.replace(tmp, path)
+    except BaseException:
+        try: os.unlink(tmp)
+        except OSError: pass
+        raise
+
 # ---------------- Editor ----------------
+# Lexer classes by name, resolved on first use
+_LEXER_CLS = {
+    ".py": "QsciLexerPython",
+    ".c": "QsciLexerCPP", ".h": "QsciLexerCPP",
+    ".cpp": "QsciLexerCPP", ".hpp": "QsciLexerCPP", ".cc": "QsciLexerCPP",
+    ".html": "QsciLexerHTML", ".htm": "QsciLexerHTML",
+    ".json": "QsciLexerJSON",
+    ".js": "QsciLexerJavaScript",
+    ".java": "QsciLexerJava",
+    ".sh": "QsciLexerBash",
+    ".f": "QsciLexerFortran77", ".f77": "QsciLexerFortran77",
+    ".f90": "QsciLexerFortran", ".f95": "QsciLexerFortran",
+}
+
 class SciEditor(QsciScintilla):
     bookmarkClicked = pyqtSignal(int)
     zoomChangedX = pyqtSignal(int)
@@ -207,6 +422,12 @@ class SciEditor(QsciScintilla):
         self.file_state = FileState(path=None)
         self._recording = False
         self._macro: List[Tuple[str, str]] = []
+        self._line_starts: Optional[List[int]] = None
+        self._lexers: Dict[str, QsciLexer] = {}  # styled lexer per class name, reused on re-apply
+        self.big_file = False
+        self._bookmarks: Optional[List[int]] = None  # sorted bookmarked lines; markers move with edits, so dropped on change
+        self.edit_serial = 0  # bumped on every text change; validates cached search results
+        self.textChanged.connect(self._drop_line_starts)
         self._init_editor()
 
     def _init_editor(self):
@@ -245,28 +466,36 @@ class SciEditor(QsciScintilla):
 
         style_editor_dark(self)
 
-    def apply_lexer_for(self, path: Optional[str]):
-        lexer = None
+    def apply_lexer_for(self, path: Optional[str], force: bool = False):
+        try: big = not force and bool(path) and os.path.getsize(path) > BIG_FILE_BYTES
+        except OSError: big = False
+        self.big_file = big
+        # Styling and the per-line repaint extras are O(N) on first paint and on every edit
+        self.setCaretLineVisible(not big); self.setIndentationGuides(not big)
+        if big: self.setLexer(None); return
         ext = Path(path).suffix.lower() if path else ".py"
-        mapping = {
-            ".py": QsciLexerPython,
-            ".c": QsciLexerCPP, ".h": QsciLexerCPP,
-            ".cpp": QsciLexerCPP, ".hpp": QsciLexerCPP, ".cc": QsciLexerCPP,
-            ".html": QsciLexerHTML, ".htm": QsciLexerHTML,
-            ".json": QsciLexerJSON,
-            ".js": QsciLexerJavaScript,
-            ".java": QsciLexerJava,
-            ".sh": QsciLexerBash,
-            ".f": QsciLexerFortran77, ".f77": QsciLexerFortran77,
-            ".f90": QsciLexerFortran, ".f95": QsciLexerFortran,
-        }
-        L = mapping.get(ext)
-        if L:
-            lexer = L(self)
+        name = _LEXER_CLS.get(ext); lexer = self._lexers.get(name) if name else None
+        if name and lexer is None:
+            lexer = self._lexers[name] = getattr(Qsci, name)(self)
             try: lexer.setDefaultFont(best_mono_font(13))
             except Exception: pass
             style_lexer_dark(lexer)
-        self.setLexer(lexer)
+        if lexer is not self.lexer(): self.setLexer(lexer)
+
+    def _drop_line_starts(self): self._line_starts = None; self._bookmarks = None; self.edit_serial += 1
+
+    def line_starts(self) -> List[int]:
+        """Offsets into text() where each line begins; rebuilt lazily after an edit."""
+        if self._line_starts is None:
+            self._line_starts = [0] + [m.end() for m in _EOL_RE.finditer(self.text())]
+        return self._line_starts
+
+    def text_view(self) -> memoryview:
+        """Zero-copy view of Scintilla's UTF-8 buffer; only valid until the next edit."""
+        n = self.SendScintilla(QsciScintilla.SCI_GETLENGTH)
+        # PtrResult: SendScintilla's long result would truncate the pointer on Win64
+        ptr = self.SendScintillaPtrResult(QsciScintilla.SCI_GETCHARACTERPOINTER)
+        return memoryview((ctypes.c_char * n).from_address(int(ptr))).cast("B")
 
     def set_eol(self, eol: str):
         e = eol.upper()
@@ -300,14 +529,9 @@ class SciEditor(QsciScintilla):
         if not path: return False
         enc = encoding or self.file_state.encoding or "utf-8"
         text = self.text()
-        if self.file_state.eol == "CRLF":
-            text = text.replace("\r\n", "\n").replace("\n", "\r\n")
-        elif self.file_state.eol == "CR":
-            text = text.replace("\r\n", "\n").replace("\n", "\r")
-        else:
-            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        text = _EOL_RE.sub({"CRLF": "\r\n", "CR": "\r"}.get(self.file_state.eol, "\n"), text)
         try:
-            Path(path).write_text(text, encoding=enc, errors="strict")
+            write_text_atomic(path, text, enc)
             self.file_state.path = path; self.file_state.encoding = enc
             try: self.file_state.mtime = os.path.getmtime(path)
             except Exception: self.file_state.mtime = None
@@ -331,27 +555,54 @@ class SciEditor(QsciScintilla):
 
     def _margin_clicked(self, margin, line, state):
         if margin == 1:
-            marks = self.markersAtLine(line)
+            marks = self.markersAtLine(line); bm = self.bookmark_lines()
             if marks & (1 << self.MARK_BOOKMARK):
                 self.markerDelete(line, self.MARK_BOOKMARK)
+                i = bisect.bisect_left(bm, line)
+                if i < len(bm) and bm[i] == line: del bm[i]
             else:
-                self.markerAdd(line, self.MARK_BOOKMARK)
+                self.markerAdd(line, self.MARK_BOOKMARK); bisect.insort(bm, line)
             self.bookmarkClicked.emit(line)
 
+    def bookmark_lines(self) -> List[int]:
+        """Sorted bookmarked lines, collected with markerFindNext (one call per bookmark) after an edit."""
+        if self._bookmarks is None:
+            mask = 1 << self.MARK_BOOKMARK; out = []; ln = self.markerFindNext(0, mask)
+            while ln >= 0: out.append(ln); ln = self.markerFindNext(ln + 1, mask)
+            self._bookmarks = out
+        return self._bookmarks
+
+    def replace_all_plain(self, pat: str, rep: str, cs: bool, ww: bool) -> Optional[int]:
+        """Replace every plain-text match in place (SEARCHINTARGET/REPLACETARGET over Scintilla's
+        gap buffer) as one undo step, without copying the document into Python.
+        None if the pattern or replacement can't be encoded for a non-UTF-8 document."""
+        S = self.SendScintilla; Q = QsciScintilla; enc = "utf-8" if self.isUtf8() else "latin-1"
+        try: pb, rb = pat.encode(enc), rep.encode(enc)
+        except UnicodeEncodeError: return None  # "replace" would search for (and rewrite) every '?'
+        n = 0
+        S(Q.SCI_SETSEARCHFLAGS, (Q.SCFIND_MATCHCASE if cs else 0) | (Q.SCFIND_WHOLEWORD if ww else 0))
+        S(Q.SCI_SETTARGETSTART, 0); S(Q.SCI_SETTARGETEND, self.length())
+        self.beginUndoAction()
+        try:
+            while S(Q.SCI_SEARCHINTARGET, len(pb), pb) >= 0:
+                S(Q.SCI_REPLACETARGET, len(rb), rb); n += 1
+                S(Q.SCI_SETTARGETSTART, S(Q.SCI_GETTARGETEND)); S(Q.SCI_SETTARGETEND, self.length())
+        finally:
+            self.endUndoAction()
+        return n
+
+    # Both directions wrap around the document
     def next_bookmark_line(self, from_line: int) -> Optional[int]:
-        maxl = self.lines()
-        for l in range(from_line + 1, maxl):
-            if self.markersAtLine(l) & (1 << self.MARK_BOOKMARK): return l
-        for l in range(0, from_line + 1):
-            if self.markersAtLine(l) & (1 << self.MARK_BOOKMARK): return l
-        return None
+        bm = self.bookmark_lines()
+        if not bm: return None
+        i = bisect.bisect_right(bm, from_line)
+        return bm[i] if i < len(bm) else bm[0]
 
     def prev_bookmark_line(self, from_line: int) -> Optional[int]:
-        for l in range(from_line - 1, -1, -1):
-            if self.markersAtLine(l) & (1 << self.MARK_BOOKMARK): return l
-        for l in range(self.lines() - 1, from_line - 1, -1):
-            if self.markersAtLine(l) & (1 << self.MARK_BOOKMARK): return l
-        return None
+        bm = self.bookmark_lines()
+        if not bm: return None
+        i = bisect.bisect_left(bm, from_line)
+        return bm[i-1] if i > 0 else bm[-1]
 
     def start_macro(self): self._macro.clear(); self._recording = True
     def stop_macro(self): self._recording = False
@@ -415,6 +666,9 @@ class FindReplaceDialog(QDialog):
         btn_prev.clicked.connect(lambda: self._emit(True))
         btn_repl.clicked.connect(self._emit_repl_one)
         btn_all.clicked.connect(self._emit_repl_all)
+        # Incremental find runs once typing pauses, not on every keystroke
+        self._inc_timer = QTimer(self); self._inc_timer.setSingleShot(True); self._inc_timer.setInterval(80)
+        self._inc_timer.timeout.connect(lambda: self._emit(False))
         self.find_edit.textChanged.connect(self._incremental)
 
     def _opts(self):
@@ -435,7 +689,7 @@ class FindReplaceDialog(QDialog):
 
     def _incremental(self, _):
         if self.inc_cb.isChecked():
-            self._emit(False)
+            self._inc_timer.start()
 
 class FindInFilesDialog(QDialog):
     search_requested = pyqtSignal(str, str, str, bool, bool, bool)
@@ -470,12 +724,16 @@ class ResultsDock(QDockWidget):
         super().__init__("Search Results", parent); self.setObjectName("SearchResultsDock")
         self.tree = QTreeWidget(); self.tree.setColumnCount(4)
         self.tree.setHeaderLabels(["File", "Line", "Column", "Preview"])
-        self.tree.header().setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
-        self.tree.header().setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
-        self.tree.header().setSectionResizeMode(2, QHeaderView.ResizeMode.ResizeToContents)
+        # Columns 0-2 are sized once in finish(); ResizeToContents would rescan every row on each insert
         self.tree.header().setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch)
         w = QWidget(); lay = QVBoxLayout(w); lay.setContentsMargins(0,0,0,0); lay.addWidget(self.tree); self.setWidget(w)
-    def clear(self): self.tree.clear()
+    def clear(self): self.tree.setSortingEnabled(False); self.tree.clear()
+    def add_batch(self, rows: list):
+        tree = self.tree; tree.setUpdatesEnabled(False)
+        tree.addTopLevelItems([QTreeWidgetItem([path, str(line), str(col), snippet]) for path, line, col, snippet in rows])
+        tree.setUpdatesEnabled(True)
+    def finish(self):
+        for c in (0, 1, 2): self.tree.resizeColumnToContents(c)
 
 class FunctionListDock(QDockWidget):
     def __init__(self, parent=None):
@@ -502,6 +760,12 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.setWindowTitle(APP_NAME); self.resize(1380, 880)
         self.settings = QSettings(APP_ORG, APP_NAME)
+        self._last_find = None  # (query/document key, (match starts, match ends)) of the last Python-path find
+        self._find_job: Optional[SearchRunnable] = None; self._find_seq = 0
+        # Recent files live in memory; settings write + menu rebuild are coalesced 500 ms after the last change
+        self._recent_cache: List[str] = self.settings.value("recent_files", [], list) or []
+        self._recent_timer = QTimer(self); self._recent_timer.setSingleShot(True); self._recent_timer.setInterval(500)
+        self._recent_timer.timeout.connect(self._flush_recents)
         self.setUnifiedTitleAndToolBarOnMac(True)
 
         # Central: Split view with two tab bars
@@ -543,7 +807,7 @@ class MainWindow(QMainWindow):
         self.results_dock.tree.itemDoubleClicked.connect(self._open_result_item)
 
         # Timers & session
-        self.disk_timer = QTimer(self); self.disk_timer.timeout.connect(self._check_disk_changes); self.disk_timer.start(CHECK_DISK_MS)
+        self.watcher = QFileSystemWatcher(self); self.watcher.fileChanged.connect(self._on_file_changed)
         self._load_session()
 
         # Drag & drop
@@ -597,7 +861,9 @@ class MainWindow(QMainWindow):
         ed.caretMovedX.connect(self._update_status_pos); ed.zoomChangedX.connect(lambda pct: self.zoom_label.setText(f"{pct}%"))
         tabs = self._other_tabs() if in_other else self._current_tabs()
         idx = tabs.addTab(tab, os.path.basename(path)); tabs.setCurrentIndex(idx)
-        self._add_recent(path); self._update_status_all(); self._update_function_list()
+        self._watch(path); self._add_recent(path)
+        if ed.big_file: self.status.showMessage("Large file: syntax highlighting off (Tools → Force Syntax Highlighting)", 5000)
+        self._update_status_all(); self._update_function_list()
 
     def save_file(self, save_as: bool=False):
         ed = self._editor()
@@ -608,9 +874,10 @@ class MainWindow(QMainWindow):
             new_path, _ = QFileDialog.getSaveFileName(self, "Save As", start_dir, "All Files (*.*)")
             if not new_path: return
             if ed.save_to_file(new_path):
-                self._set_cur_tab_title(os.path.basename(new_path)); self._add_recent(new_path)
+                if path: self.watcher.removePath(path)
+                self._watch(new_path); self._set_cur_tab_title(os.path.basename(new_path)); self._add_recent(new_path)
         else:
-            if ed.save_to_file(path): self.status.showMessage(f"Saved {path}", 2000)
+            if ed.save_to_file(path): self._watch(path); self.status.showMessage(f"Saved {path}", 2000)
         self._update_status_all()
 
     def save_all(self):
@@ -620,8 +887,7 @@ class MainWindow(QMainWindow):
                 ed = w.editor
                 if not ed.file_state.path:
                     tabs.setCurrentIndex(i); self.save_file(save_as=True)
-                else:
-                    ed.save_to_file(ed.file_state.path)
+                elif ed.save_to_file(ed.file_state.path): self._watch(ed.file_state.path)
         self._update_status_all()
 
     def reload_from_disk(self):
@@ -635,9 +901,13 @@ class MainWindow(QMainWindow):
         self._update_status_all(); self._update_function_list()
 
     def closeEvent(self, e: QCloseEvent):
+        if self._find_job: self._find_job.cancel()
+        if self._recent_timer.isActive(): self._flush_recents()
         self._save_session(); super().closeEvent(e)
 
     def _close_tab(self, tabs: QTabWidget, index: int):
+        w = tabs.widget(index)
+        if isinstance(w, EditorTab) and w.editor.file_state.path: self.watcher.removePath(w.editor.file_state.path)
         tabs.removeTab(index)
         if tabs.count() == 0 and tabs is self.tabs_left: self.new_file()
 
@@ -647,56 +917,81 @@ class MainWindow(QMainWindow):
 
     # Recent
     def _add_recent(self, path: str):
-        rec = self.settings.value("recent_files", [], list); abspath = os.path.abspath(path)
+        rec = self._recent_cache; abspath = sys.intern(os.path.abspath(path))
+        if rec and rec[0] == abspath: return
         if abspath in rec: rec.remove(abspath)
-        rec.insert(0, abspath); rec = rec[:MAX_RECENTS]
-        self.settings.setValue("recent_files", rec); self._rebuild_recents_menu()
+        rec.insert(0, abspath); del rec[MAX_RECENTS:]
+        self._recent_timer.start()
+
+    def _flush_recents(self):
+        self._recent_timer.stop(); self.settings.setValue("recent_files", self._recent_cache); self._rebuild_recents_menu()
+
+    def _clear_recents(self):
+        self._recent_cache.clear(); self._flush_recents()
 
     def _rebuild_recents_menu(self):
-        self.recent_menu.clear(); rec = self.settings.value("recent_files", [], list)
+        self.recent_menu.clear(); rec = self._recent_cache
         if not rec: a = self.recent_menu.addAction("(Empty)"); a.setEnabled(False)
         else:
             for p in rec:
                 act = self.recent_menu.addAction(p)
                 act.triggered.connect(lambda _, path=p: self._open_path(path))
-            self.recent_menu.addSeparator(); self.recent_menu.addAction("Clear List", lambda: (self.settings.setValue("recent_files", []), self._rebuild_recents_menu()))
+            self.recent_menu.addSeparator(); self.recent_menu.addAction("Clear List", self._clear_recents)
 
     # Search/Replace helpers
-    def _pos_from_linecol(self, text: str, line: int, col: int) -> int:
-        lines = text.splitlines(keepends=True); acc = 0
-        for i in range(min(line, len(lines))): acc += len(lines[i])
-        return acc + col
-
-    def _linecol_from_pos(self, text: str, pos: int) -> Tuple[int,int]:
-        lines = text.splitlines(keepends=True); acc = 0
-        for i, ln in enumerate(lines):
-            if acc + len(ln) > pos: return i, pos - acc
-            acc += len(ln)
-        return len(lines)-1, 0
+    def _pos_from_linecol(self, ed: SciEditor, line: int, col: int) -> int:
+        starts = ed.line_starts()
+        return starts[min(line, len(starts)-1)] + col
+
+    def _linecol_from_pos(self, ed: SciEditor, pos: int) -> Tuple[int,int]:
+        starts = ed.line_starts(); i = bisect.bisect_right(starts, pos) - 1
+        return i, pos - starts[i]
+
+    def _linecol_pair(self, ed: SciEditor, s: int, e: int) -> Tuple[int,int,int,int]:
+        starts = ed.line_starts(); i = bisect.bisect_right(starts, s) - 1
+        j = bisect.bisect_right(starts, e, i) - 1  # end can't precede start: search only from line i
+        return i, s - starts[i], j, e - starts[j]
 
     def _find_in_text(self, ed: SciEditor, pattern: str, cs: bool, ww: bool, rx: bool, sel_only: bool, backwards: bool) -> bool:
-        text = ed.text()
-        if sel_only and ed.hasSelectedText():
-            s = ed.selectedText().replace('\r\n', '\n')
-            text = s
+        if not pattern: return False
+        has_sel = ed.hasSelectedText(); in_sel = sel_only and has_sel
+        if not rx and not in_sel:
+            # Plain text: Scintilla searches its own buffer (SCI_SEARCHINTARGET), no Python copy
+            line, col = ed.getSelection()[:2] if backwards and has_sel else ed.getCursorPosition()
+            return ed.findFirst(pattern, False, cs, ww, True, not backwards, line, col, True)
+        # Whole-document regex that means the same in bytes mode runs over Scintilla's own UTF-8
+        # buffer in byte offsets; anything with \w, \b, '.' etc. goes through the decoded text.
+        p = _build_pattern(pattern, rx, ww)
+        raw = not in_sel and ed.isUtf8() and bytes_safe(p)
+        if raw:
+            start_pos = ed.SendScintilla(QsciScintilla.SCI_GETCURRENTPOS)
+        elif in_sel:
             l1, c1, _, _ = ed.getSelection()
-            start_pos = self._pos_from_linecol(ed.text(), l1, c1)
+            start_pos = self._pos_from_linecol(ed, l1, c1)
         else:
-            start_pos = self._pos_from_linecol(text, *ed.getCursorPosition())
-        if not rx: pattern = re.escape(pattern)
-        if ww: pattern = r"\b" + pattern + r"\b"
-        flags = 0 if cs else re.IGNORECASE
-        R = re.compile(pattern, flags | re.MULTILINE)
-        if backwards:
-            m = None
-            for mm in R.finditer(text, 0, start_pos): m = mm
+            start_pos = self._pos_from_linecol(ed, *ed.getCursorPosition())
+        # Every match of a query is collected once per document revision; Find Next/Previous then
+        # only bisects from the caret. A selection search depends on the selection's text as well.
+        key = (id(ed), ed.edit_serial, pattern, cs, ww, rx, raw, in_sel, ed.getSelection() if in_sel else None)
+        if self._last_find and self._last_find[0] == key:
+            starts, ends = self._last_find[1]
         else:
-            st = start_pos + 1 if ed.hasSelectedText() else start_pos
-            m = R.search(text, st)
-        if not m: m = R.search(text, 0)
-        if not m: return False
-        s, e = m.start(), m.end()
-        l1, c1 = self._linecol_from_pos(ed.text(), s); l2, c2 = self._linecol_from_pos(ed.text(), e)
+            text = ed.text_view() if raw else (ed.selectedText().replace('\r\n', '\n') if in_sel else ed.text())
+            flags = 0 if cs else re.IGNORECASE
+            R = _compile_re(p.encode("ascii") if raw else p, flags | re.MULTILINE)
+            starts, ends = [], []
+            for m in R.finditer(text): starts.append(m.start()); ends.append(m.end())
+            self._last_find = (key, (starts, ends))
+        if not starts: return False
+        if backwards: i = max(bisect.bisect_right(ends, start_pos) - 1, 0)  # none before: wrap to the first
+        else:
+            i = bisect.bisect_left(starts, start_pos + 1 if has_sel else start_pos)
+            if i == len(starts): i = 0
+        s, e = starts[i], ends[i]
+        if raw:
+            ed.SendScintilla(QsciScintilla.SCI_SETSEL, s, e)
+            ed.ensureLineVisible(ed.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, s)); return True
+        l1, c1, l2, c2 = self._linecol_pair(ed, s, e)
         ed.setSelection(l1, c1, l2, c2); ed.ensureLineVisible(l1); return True
 
     def _replace_one(self, pat, rep, cs, ww, rx, sel_only):
@@ -707,9 +1002,13 @@ class MainWindow(QMainWindow):
 
     def _replace_all(self, pat, rep, cs, ww, rx, sel_only):
         ed = self._editor();
-        if not ed: return
+        if not ed or not pat: return
+        in_sel = sel_only and ed.hasSelectedText()
+        if not rx and not in_sel:
+            n = ed.replace_all_plain(pat, rep, cs, ww)
+            if n is not None: self.status.showMessage(f"Replaced {n} occurrence(s)", 2000); return
         text = ed.text()
-        if sel_only and ed.hasSelectedText():
+        if in_sel:
             l1, c1, l2, c2 = ed.getSelection(); sel_text = ed.selectedText().replace('\r\n','\n')
             R = re.compile(pat if rx else re.escape(pat), 0 if cs else re.IGNORECASE | re.MULTILINE)
             new_sel = R.sub(rep, sel_text); ed.setSelection(l1,c1,l2,c2); ed.replaceSelectedText(new_sel)
@@ -728,31 +1027,29 @@ class MainWindow(QMainWindow):
         self.find_files_dialog.search_requested.connect(self._run_find_in_files, type=Qt.ConnectionType.UniqueConnection)
 
     def _run_find_in_files(self, root: str, masks: str, text: str, case: bool, whole: bool, regex: bool):
-        mask_list = [m.strip() for m in masks.split(";") if m.strip()]
         self.results_dock.clear(); self.results_dock.show()
         flags = 0 if case else re.IGNORECASE
-        if not regex: text = re.escape(text)
-        if whole: text = r"\b" + text + r"\b"
-        try: R = re.compile(text, flags | re.MULTILINE)
+        try: R = files_pattern(text, case, whole, regex)
         except re.error as e: QMessageBox.warning(self, "Regex error", str(e)); return
-
-        def iter_files():
-            p = Path(root);
-            if not p.exists(): return
-            it = p.rglob("*") if self.find_files_dialog.recur_cb.isChecked() else p.glob("*")
-            for f in it:
-                if f.is_file():
-                    if mask_list and not any(fnmatch.fnmatch(f.name, m) for m in mask_list): continue
-                    yield f
-
-        for f in iter_files():
-            try: data = f.read_text(encoding="utf-8", errors="ignore")
-            except Exception: continue
-            for m in R.finditer(data):
-                line = data.count("\n", 0, m.start()) + 1
-                col = m.start() - (data.rfind("\n", 0, m.start()) + 1)
-                snippet = data[max(0, m.start()-40):m.end()+40].replace("\n", " ")
-                self.results_dock.tree.addTopLevelItem(QTreeWidgetItem([str(f), str(line), str(col+1), snippet]))
+        # Hyperscan and pcre2 (no UTF/UCP) match bytes with ASCII-only \w/\b and case folding:
+        # only a bytes pattern can safely rule files out or be swapped for its JIT build
+        pre = None
+        if isinstance(R.pattern, bytes):
+            pre = hs_prefilter(R.pattern, flags); R = jit_pattern(R.pattern, flags) or R
+        mask_re = mask_pattern(masks)
+
+        # Walk + scan on the pool; a new search cancels the previous one and drops its late batches
+        if self._find_job: self._find_job.cancel()
+        # Slots match on a sequence number, not the job: a lambda holding the job would keep it alive
+        self._find_seq += 1; k = self._find_seq
+        job = self._find_job = SearchRunnable(root, self.find_files_dialog.recur_cb.isChecked(), mask_re, R, pre)
+        job.signals.results.connect(lambda batch, k=k: k == self._find_seq and self.results_dock.add_batch(batch))
+        job.signals.error.connect(lambda msg, k=k: k == self._find_seq and QMessageBox.warning(self, "Find in Files", msg))
+        job.signals.finished.connect(lambda n, k=k: k == self._find_seq and self._find_files_done(n))
+        self.status.showMessage("Searching…"); QThreadPool.globalInstance().start(job)
+
+    def _find_files_done(self, n: int):
+        self._find_job = None; self.results_dock.finish(); self.status.showMessage(f"Find in Files: {n} match(es)", 3000)
 
     def _open_result_item(self, item: QTreeWidgetItem, _col: int):
         path, line, col = item.text(0), int(item.text(1)), int(item.text(2))
@@ -788,17 +1085,23 @@ class MainWindow(QMainWindow):
         if not ed: return
         ed.setCursorPosition(ln-1, 0); ed.ensureLineVisible(ln-1)
 
-    # Disk changes
-    def _check_disk_changes(self):
+    # Disk changes (inotify/FSEvents via QFileSystemWatcher; only the changed path is looked at)
+    def _watch(self, path: str):
+        if path and os.path.exists(path) and path not in self.watcher.files(): self.watcher.addPath(path)
+
+    def _on_file_changed(self, path: str):
+        self._watch(path)  # atomic saves replace the inode, which drops the watch
+        target = os.path.abspath(path)
         for tabs in (self.tabs_left, self.tabs_right):
             for i in range(tabs.count()):
                 w: EditorTab = tabs.widget(i)  # type: ignore
                 ed = w.editor; p = ed.file_state.path
-                if not p: continue
+                if not p or os.path.abspath(p) != target: continue
                 try: m = os.path.getmtime(p)
-                except Exception: continue
+                except Exception: return
                 if ed.file_state.mtime and m > ed.file_state.mtime and not ed.isModified():
                     ed.load_from_file(p)
+                return
 
     # Status updates
     def _update_status_pos(self, line: int, col: int):
@@ -874,6 +1177,7 @@ class MainWindow(QMainWindow):
         self.act_external_cmd = QAction("Run &External…", self, triggered=self._run_external)
         self.act_dictation = QAction("Start &Dictation", self, triggered=self._start_dictation)
         self.act_selftest = QAction("Self Test Report", self, triggered=self._self_test)
+        self.act_force_lexer = QAction("Force &Syntax Highlighting", self, triggered=self._force_lexer)
 
     def _make_menus(self):
         mb = self.menuBar()
@@ -919,7 +1223,7 @@ class MainWindow(QMainWindow):
 
         # Tools
         m_tools = mb.addMenu("&Tools")
-        for a in (self.act_run_python, self.act_external_cmd, self.act_dictation, self.act_selftest): m_tools.addAction(a)
+        for a in (self.act_run_python, self.act_external_cmd, self.act_dictation, self.act_selftest, self.act_force_lexer): m_tools.addAction(a)
 
         # Help
         m_help = mb.addMenu("&Help")
@@ -1006,6 +1310,10 @@ class MainWindow(QMainWindow):
                 self.m_plugins.addAction(f"{pyf.stem} (load error: {e})").setEnabled(False)
 
     # Tools
+    def _force_lexer(self):
+        ed = self._editor()
+        if ed and ed.big_file: ed.apply_lexer_for(ed.file_state.path, force=True)
+
     def _run_python_current(self):
         ed = self._editor()
         if not ed or not ed.file_state.path:
@@ -0,0 +1,41 @@
+import os
+import pytest
+
+pytest.importorskip("PyQt6.Qsci")
+from notepadpp_pro1 import bytes_safe, files_pattern, scan_file, write_text_atomic
+
+TEXT = "un café caf\nÉCOLE naïve\n"
+
+def _find(tmp_path, query, case=True, whole=False, regex=False):
+    f = tmp_path / "a.txt"
+    f.write_text(TEXT, encoding="utf-8")
+    return [(line, col) for line, col, _ in scan_file(str(f), files_pattern(query, case, whole, regex))]
+
+def test_bytes_safe():
+    assert bytes_safe("foo") and bytes_safe(r"foo\.bar")
+    for p in (r"\bfoo\b", r"\w+", "a.b", "[^a]", "(?u)foo", r"\N{BULLET}", r"\\.", "café"):
+        assert not bytes_safe(p), p
+
+def test_find_in_files_non_ascii(tmp_path):
+    assert _find(tmp_path, "café", whole=True) == [(1, 4)]
+    assert _find(tmp_path, "école", case=False) == [(2, 1)]
+    assert _find(tmp_path, "caf", whole=True) == [(1, 9)]     # not inside "café"
+    assert _find(tmp_path, "na.ve", regex=True) == [(2, 7)]
+    assert _find(tmp_path, "caf") == [(1, 4), (1, 9)]         # byte-safe: raw mmap path
+
+def test_find_in_files_str_only_pattern(tmp_path):
+    assert isinstance(files_pattern("(?u)caf", True, False, True).pattern, str)
+    assert _find(tmp_path, "(?u)caf", regex=True) == [(1, 4), (1, 9)]
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="no symlinks")
+def test_write_text_atomic_through_symlink(tmp_path):
+    target = tmp_path / "target.txt"
+    target.write_text("old", encoding="utf-8")
+    os.chmod(target, 0o640)
+    link = tmp_path / "link.txt"
+    link.symlink_to(target)
+    write_text_atomic(str(link), "new ü", "utf-8")
+    assert link.is_symlink()
+    assert target.read_text(encoding="utf-8") == "new ü"
+    assert os.stat(target).st_mode & 0o777 == 0o640
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["link.txt", "target.txt"]